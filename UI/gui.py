@@ -1,21 +1,27 @@
 import os.path
-import time
-import win32print
-from threading import Thread
+import tempfile
 
 import customtkinter
 from customtkinter import filedialog
 from CTkMessagebox import CTkMessagebox
 
 from UI.widgets.date_entry import DateEntry
-from UI.widgets.pdf_gen_progress_bar import StickerGenProgressBar
+from UI.ui_channel import UIChannel
+from UI.widgets.generation_queue_frame import GenerationQueueFrame
 from UI.widgets.int_spinbox import IntSpinbox
+from sticker.generation_scheduler import GenerationScheduler, GenerationJobStates
+from sticker.sheet_layout import SheetLayout
 from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
 from print.printer import Printer
+from print.print_queue import PrintQueue, PrintJobStates
+from print.printer_registry import PrinterRegistry
 
 customtkinter.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
 customtkinter.set_default_color_theme("UI/theme/agrocentre.json")  # Themes: "blue" (standard), "green", "dark-blue"
 
+# Time in milliseconds between two checks of the stickers model file
+MODEL_CHECK_INTERVAL = 2000
+
 
 class App(customtkinter.CTk):
     """
@@ -23,22 +29,34 @@ class App(customtkinter.CTk):
     """
     sticker_frame = None
 
-    def __init__(self, stickers):
+    def __init__(self, stickers, model_loader=None):
         """
         App constructor
         :param stickers: Stickers object that contains all the stickers
+        :param model_loader: StickerModelLoader of the stickers, to show the changes of the model file without
+                             restarting | None to keep the stickers
         :return: None
         """
         super().__init__()
-        self.button = None
+        self.generate_button = None
+        self.print_button = None
         self.stickers = stickers
+        self.model_loader = model_loader
+        self.model_error = None
         self.geometry("500x488")
         self.title("Sticker - AGROCENTRE & KILOMETRE ZERO")
         self.iconbitmap("UI/assets/icon.ico")
-        self.thread = None
+        self.last_stage_durations = {}
+        self.reported_jobs = set()
         # self.resizable(False, False)
 
-        self.printer = Printer()
+        self.printer_registry = PrinterRegistry()
+        self.printer = Printer(registry=self.printer_registry)
+        self.ui_channel = UIChannel(self)
+        self.print_queue = PrintQueue(self.printer,
+                                      state_callback=lambda job: self.ui_channel.post(self.print_job_changed, job))
+        self.scheduler = GenerationScheduler(workers=2,
+                                             state_callback=lambda job: self.ui_channel.post(self.job_changed, job))
 
         # self.grid_rowconfigure(0, weight=1)
         # self.grid_columnconfigure((0, 1), weight=1)
@@ -57,9 +75,16 @@ class App(customtkinter.CTk):
                                                            dropdown_font=("Calibri", 24), width=280)
         self.combobox_stickers.grid(row=1, column=1, columnspan=1, padx=10, pady=10)
 
-        self.printer_choice_frame = PrinterChoiceFrame(self, self.set_printer)
+        self.printer_choice_frame = PrinterChoiceFrame(self, self.printer_registry, self.set_printer)
         self.printer_choice_frame.grid(row=5, column=0, columnspan=1, rowspan=1, sticky="nsew", padx=10, pady=10)
 
+        self.generation_queue_frame = GenerationQueueFrame(self, self.scheduler, height=60, width=150)
+        self.generation_queue_frame.grid(row=4, column=0, columnspan=1, padx=10, pady=10, sticky="ew")
+
+        if self.model_loader is not None:
+            self.after(MODEL_CHECK_INTERVAL, self.check_model)
+        self.after(0, self.show_unusable_stickers)
+
     def display_sticker(self, choice):
         """
         Display the sticker
@@ -68,101 +93,98 @@ class App(customtkinter.CTk):
         """
         if self.stickers.selected_sticker is not None and choice == self.stickers.selected_sticker.name:
             return
+        if choice not in self.stickers:
+            return
         if self.sticker_frame is not None:
             self.sticker_frame.destroy()
             self.sticker_frame.pack_forget()
-        self.stickers.selected_sticker = next(
-            sticker for sticker in self.stickers.stickers_list if sticker.name == choice)
+        self.stickers.selected_sticker = self.stickers.get_sticker(choice)
         self.sticker_frame = StickerFrame(self, self.stickers.selected_sticker)
         self.sticker_frame.grid(row=2, column=1, columnspan=1, rowspan=10, sticky="nsew", padx=10, pady=10)
 
-        self.button = customtkinter.CTkButton(self,
-                                              text="Générer",
-                                              command=lambda: self.generate_sticker_callback(self.sticker_frame))
-        self.button.grid(row=3, column=0, columnspan=1, padx=10, pady=10)
+        if self.generate_button is None:
+            self.generate_button = customtkinter.CTkButton(self,
+                                                           text="Générer",
+                                                           command=lambda: self.generate_sticker_callback(
+                                                               self.sticker_frame))
+            self.generate_button.grid(row=3, column=0, columnspan=1, padx=10, pady=10)
 
-        self.button = customtkinter.CTkButton(self,
-                                              text="Imprimer",
-                                              command=lambda: self.print_sticker_callback(self.sticker_frame))
-        self.button.grid(row=6, column=0, columnspan=1, padx=10, pady=10)
+            self.print_button = customtkinter.CTkButton(self,
+                                                        text="Imprimer",
+                                                        command=lambda: self.print_sticker_callback(self.sticker_frame))
+            self.print_button.grid(row=6, column=0, columnspan=1, padx=10, pady=10)
 
-    def generate_sticker_callback(self, sticker_frame):
+    def remove_sticker(self):
         """
-        Callback for the generate button
-        :param sticker_frame: Frame that contains the sticker fields
+        Remove the displayed sticker and its buttons (e.g. its sticker type is no longer in the model)
         :return: None
         """
-        if self.thread is not None and self.thread.is_alive():
-            CTkMessagebox(title="Error", message="Il y a dejà un sticker en cours de création", icon="cancel")
-            return
-
-        self.thread = Thread(target=self.generate_sticker_generate_method, args=(sticker_frame,)).start()
+        if self.sticker_frame is not None:
+            self.sticker_frame.destroy()
+            self.sticker_frame = None
+        for button in (self.generate_button, self.print_button):
+            if button is not None:
+                button.destroy()
+        self.generate_button = None
+        self.print_button = None
+        self.combobox_stickers.set("")
 
-    def generate_sticker_generate_method(self, sticker_frame):
+    def generate_sticker_callback(self, sticker_frame):
         """
-        Generate the sticker with the generate method (no printing)
+        Callback for the generate button, queues the generation of the sticker and opens the pdf once generated
         :param sticker_frame: Frame that contains the sticker fields
-        :return: None
+        :return: The GenerationJob of the sticker if it was queued, None otherwise
         """
-        result = self.generate_sticker(sticker_frame)
-        if result is False:
-            return
-
-        os.startfile(result)
+        if sticker_frame is None:
+            return None
+        return self.submit_sticker(sticker_frame, on_done=lambda job: os.startfile(job.save_file_path))
 
     def print_sticker_callback(self, sticker_frame):
         """
-        Callback for the print button
+        Callback for the print button, queues the generation of the sticker and prints it once generated
         :param sticker_frame: Frame that contains the sticker fields
-        :return: None
-        """
-        if self.thread is not None and self.thread.is_alive():
-            CTkMessagebox(title="Error", message="Il y a dejà un sticker en cours de création", icon="cancel")
-            return
-
-        self.thread = Thread(target=self.generate_sticker_print_method, args=(sticker_frame,)).start()
-
-    def generate_sticker_print_method(self, sticker_frame):
-        """
-        Generate the sticker with the print method (printing)
-        :param sticker_frame: Frame that contains the sticker fields
-        :return: None
-        """
-        filename = os.getcwd() + "\\tmp\\tmp_1.pdf"
-        while os.path.exists(filename):
-            number = (filename.split(".")[0]).split("_")[-1]
-            filename = filename.replace(number, str(int(number) + 1))
-        result = self.generate_sticker(sticker_frame, filename)
-        if result is False:
-            return
-
-        Thread(target=self.printer.print, args=(result,)).start()
+        :return: The GenerationJob of the sticker if it was queued, None otherwise
+        """
+        if sticker_frame is None:
+            return None
+        tmp_directory = os.path.join(os.getcwd(), "tmp")
+        os.makedirs(tmp_directory, exist_ok=True)
+        # the name is reserved now, the jobs queued before may not have created their file yet
+        fd, filename = tempfile.mkstemp(prefix="tmp_", suffix=".pdf", dir=tmp_directory)
+        os.close(fd)
+        job = self.submit_sticker(sticker_frame, filename, on_done=lambda job: self.print_sticker(job.save_file_path),
+                                  delete_file=True)
+        if job is None:
+            os.remove(filename)
+        return job
 
     def print_sticker(self, file_path):
         """
-        Print the sticker
+        Print the sticker, the file is deleted once the spooler has it
         :param file_path: path to the sticker pdf file
-        :return: None
+        :return: The PrintJob of the file
         """
-        self.printer.print(file_path)
-        time.sleep(60)
-        os.remove(file_path)
+        return self.print_queue.submit(file_path, delete_file=True)
 
-    def generate_sticker(self, sticker_frame, save_file_path=None):
+    def submit_sticker(self, sticker_frame, save_file_path=None, on_done=None, delete_file=False):
         """
-        Generate the sticker
+        Queue the generation of the sticker, with a copy of the values of the fields taken now
         :param sticker_frame: Frame that contains the sticker fields
-        :param save_file_path: Path to save the sticker to
-        :return: Path to the sticker pdf file if it was generated, False otherwise
+        :param save_file_path: Path to save the sticker to | None to ask it
+        :param on_done: Function called with the job once the pdf is generated (from a worker thread)
+        :param delete_file: True to delete the pdf if the generation fails or is cancelled
+        :return: The GenerationJob of the sticker if it was queued, None otherwise
         """
-        sticker_frame.get_data()
+        values, errors = sticker_frame.sticker.validator.check(sticker_frame.get_values())
 
-        if not sticker_frame.sticker.is_valid():
+        if values is None:
             CTkMessagebox(title="Erreur",
-                          message="Les champs ne sont pas tous remplis ou correctement remplis.",
+                          message="Les champs ne sont pas tous remplis ou correctement remplis : "
+                                  + ", ".join(error.field for error in errors) + ".",
                           icon="cancel")
-            return False
+            return None
 
+        stickers_per_page = SheetLayout.load().slots_per_page
         stickers_left, total_stickers = self.config_sticker_frame.get_data()
         if stickers_left == "" or stickers_left is None:
             msg = CTkMessagebox(title="Attention !",
@@ -173,18 +195,18 @@ class App(customtkinter.CTk):
                                 option_1="Continuer",
                                 option_2="Annuler")
             if msg.get() == "Annuler":
-                return False
+                return None
             else:
                 stickers_left = 0
-        elif stickers_left > 24:
+        elif stickers_left > stickers_per_page:
             msg = CTkMessagebox(title="Attention !",
-                                message="Le nombre de stickers restants est supérieur à 24, êtes-vous sûr de vouloir "
-                                        "continuer ?",
+                                message="Le nombre de stickers restants est supérieur à " + str(stickers_per_page)
+                                        + ", êtes-vous sûr de vouloir continuer ?",
                                 icon="warning",
                                 option_1="Continuer",
                                 option_2="Annuler")
             if msg.get() == "Annuler":
-                return False
+                return None
             else:
                 stickers_left = 0
 
@@ -196,49 +218,129 @@ class App(customtkinter.CTk):
                                 option_1="Continuer",
                                 option_2="Annuler")
             if msg.get() == "Annuler":
-                return False
+                return None
             else:
-                total_stickers = 24
+                total_stickers = stickers_per_page
 
         if total_stickers < 1:
             CTkMessagebox(title="Erreur",
                           message="Le nombre de stickers désirés doit être supérieur à 0.",
                           icon="cancel")
-            return False
+            return None
 
         if stickers_left < 0:
             CTkMessagebox(title="Erreur",
                           message="Le nombre de stickers restants doit être supérieur ou égal à 0.",
                           icon="cancel")
-            return False
+            return None
 
         if save_file_path is None:
             save_file_path = filedialog.asksaveasfilename(filetypes=[("PDF", "*.pdf")],
                                                           defaultextension=".pdf",
                                                           initialfile=sticker_frame.sticker.name + " 1.pdf")
 
-        if not os.path.exists(os.path.dirname(save_file_path)):
-            return False
+        if not save_file_path or not os.path.exists(os.path.dirname(save_file_path)):
+            return None
 
-        progress_bar = StickerGenProgressBar(self, width=50)
-        progress_bar.grid(row=4, column=0, columnspan=1, padx=10, pady=10, sticky="ew")
-        self.update()
+        job = self.scheduler.submit(sticker_frame.sticker, values, save_file_path,
+                                    stickers_left=stickers_left,
+                                    total_stickers=total_stickers,
+                                    on_done=on_done,
+                                    delete_file=delete_file)
+        self.empty_sticker_page_config_fields()
+        return job
+
+    def job_changed(self, job):
+        """
+        Show the new state or progress of a generation job, and its error if it failed (main thread, see UIChannel)
+        :param job: Job that changed
+        :return: None
+        """
+        self.generation_queue_frame.update_job(job)
+        if job.state == GenerationJobStates.DONE:
+            self.last_stage_durations = job.stage_durations
+        elif job.state == GenerationJobStates.FAILED and job.id not in self.reported_jobs:
+            self.reported_jobs.add(job.id)
+            self.show_job_error(job)
+
+    def print_job_changed(self, job):
+        """
+        Show the error of a print job that failed (main thread, see UIChannel)
+        :param job: Print job that changed
+        :return: None
+        """
+        if job.state == PrintJobStates.FAILED:
+            CTkMessagebox(title="Erreur",
+                          message="L'impression n'a pas pu être envoyée à l'imprimante " + str(job.printer_name) + ".",
+                          icon="cancel")
+
+    def show_job_error(self, job):
+        """
+        Show the error of a failed generation job
+        :param job: Job that failed
+        :return: None
+        """
+        e = job.error
+        if e is not None and len(e.args) > 2 and e.args[0] == "Line too long":
+            message = "Le texte du champ " + e.args[1] + " (" + e.args[2] + ") est trop long pour l'autocollant."
+        else:
+            message = "Les autocollants " + job.sticker.name + " n'ont pas pu être créés."
+        CTkMessagebox(title="Erreur", message=message, icon="cancel")
+
+    def check_model(self):
+        """
+        Load the stickers model again if its file changed, checked periodically, an error is shown once (the loader
+        raises it again on every check until the file changes)
+        :return: None
+        """
         try:
-            sticker_frame.sticker.generate(save_file_path,
-                                           progress_bar.set_state,
-                                           stickers_left=stickers_left,
-                                           total_stickers=total_stickers)
+            if self.model_loader.reload_if_changed():
+                self.set_stickers(self.model_loader.stickers)
+                self.show_unusable_stickers()
+            self.model_error = None
         except Exception as e:
-            if e.args[0] == "Line too long":
+            if self.model_error is None or e.args != self.model_error.args:
+                self.model_error = e
+                print(e)
                 CTkMessagebox(title="Erreur",
-                              message="Le texte du champ " + e.args[1] + " (" + e.args[2] + ") est trop long pour "
-                                                                                            "l'autocollant.",
+                              message="Le fichier des autocollants (" + self.model_loader.model_path + ") contient des "
+                                      "erreurs, les autocollants n'ont pas été mis à jour.",
                               icon="cancel")
-            progress_bar.destroy()
-            return False
-        progress_bar.destroy()
-        self.empty_sticker_page_config_fields()
-        return save_file_path
+        self.after(MODEL_CHECK_INTERVAL, self.check_model)
+
+    def show_unusable_stickers(self):
+        """
+        Warn about the stickers of the model that can not be used (e.g. a text too long for the sticker)
+        :return: None
+        """
+        if not self.stickers.unusable_stickers:
+            return
+        for name, (path, message) in self.stickers.unusable_stickers.items():
+            print("%s%s: %s" % (name, path, message))
+        CTkMessagebox(title="Attention !",
+                      message="Les autocollants suivants ne peuvent pas être utilisés, un texte est trop long pour "
+                              "l'autocollant : " + ", ".join(self.stickers.unusable_stickers) + ".",
+                      icon="warning")
+
+    def set_stickers(self, stickers):
+        """
+        Use new stickers (e.g. the model file changed), the displayed sticker is displayed again with its new
+        definition and the values already typed
+        :param stickers: Stickers object that contains all the stickers
+        :return: None
+        """
+        selected_sticker = self.stickers.selected_sticker
+        values = self.sticker_frame.get_values() if self.sticker_frame is not None else {}
+
+        self.stickers = stickers
+        self.combobox_stickers.configure(values=self.stickers.get_stickers_values())
+        if selected_sticker is None:
+            return
+        if selected_sticker.name not in self.stickers:
+            self.remove_sticker()
+            return
+        self.display_sticker(selected_sticker.name)
+        self.sticker_frame.set_values(values)
 
     def set_printer(self, _ignored):
         """
@@ -300,7 +402,7 @@ class StickerFrame(customtkinter.CTkScrollableFrame):
             elif isinstance(data, StickerDataList):
                 customtkinter.CTkLabel(self, text=data.name, font=("Calibri", 14)).pack(pady=0, padx=10, expand=False,
                                                                                         anchor="w")
-                entry = customtkinter.CTkComboBox(self, values=data.values, width=280, font=("Calibri", 14),
+                entry = customtkinter.CTkComboBox(self, values=list(data.values), width=280, font=("Calibri", 14),
                                                   dropdown_font=("Calibri", 14))
                 entry.pack(pady=(0, 10), padx=10)
                 entry.set(data.values[0])
@@ -308,20 +410,32 @@ class StickerFrame(customtkinter.CTkScrollableFrame):
                     'entry': entry,
                     'data': data})
 
-    def get_data(self):
+    def get_values(self):
         """
-        Put the data from the entry fields into the sticker data
+        Get the values of the entry fields, the sticker data is not changed (several stickers can be generated at once)
+        :return: The values by data name
+        """
+        return {thing['data'].name: thing['entry'].get() for thing in self.entries}
+
+    def set_values(self, values):
+        """
+        Put values in the entry fields, the values of the list fields are only set if they are in the list
+        :param values: Values by data name, the fields without a value are not changed
         :return: None
         """
         for thing in self.entries:
-            if isinstance(thing['data'], StickerDataText):
-                thing['data'].value = thing['entry'].get()
-            elif isinstance(thing['data'], StickerDataNumber):
-                thing['data'].value = thing['entry'].get()
-            elif isinstance(thing['data'], StickerDataDate):
-                thing['data'].value = thing['entry'].get()
-            elif isinstance(thing['data'], StickerDataList):
-                thing['data'].value = thing['entry'].get()
+            value = values.get(thing['data'].name)
+            if value is None:
+                continue
+            if isinstance(thing['data'], StickerDataList):
+                if value in thing['data'].values:
+                    thing['entry'].set(value)
+            elif isinstance(thing['entry'], DateEntry):
+                thing['entry'].set(value)
+            else:
+                thing['entry'].delete(0, "end")
+                if value:
+                    thing['entry'].insert(0, value)
 
     def scroll_end(self):
         """
@@ -369,23 +483,41 @@ class PrinterChoiceFrame(customtkinter.CTkFrame):
     """
     Class to represent the frame that contains the printer choice field
     """
-    def __init__(self, parent, command=None, **kwargs):
+    def __init__(self, parent, registry, command=None, **kwargs):
         """
         PrinterChoiceFrame constructor
         :param parent: Parent frame
+        :param registry: PrinterRegistry of the printers to choose from
         :param command: Command to execute when the printer is changed
         :param kwargs: Keyword arguments for the customtkinter.CTkFrame class
         """
         super().__init__(parent, **kwargs)
+        self.registry = registry
+        self.registry_version = None
 
         self.label_printer_choice = customtkinter.CTkLabel(self, text="Imprimante", font=("Calibri", 14))
         self.label_printer_choice.pack(pady=0, padx=10, expand=False)
         self.printer_choice = customtkinter.CTkComboBox(self,
-                                                        values=[p[2] for p in win32print.EnumPrinters(2)],
+                                                        values=[],
                                                         font=("Calibri", 14),
                                                         command=command)
         self.printer_choice.pack(pady=(0, 10), padx=10)
-        self.printer_choice.set(win32print.GetDefaultPrinter())
+        self.printer_choice.set("Recherche des imprimantes...")
+        self.update_printers()
+
+    def update_printers(self):
+        """
+        Update the printer list when the registry enumerated the printers again, checked periodically so that the GUI
+        never waits for the enumeration
+        :return: None
+        """
+        if self.registry.version != self.registry_version:
+            first_update = self.registry_version is None or self.registry_version == 0
+            self.registry_version = self.registry.version
+            self.printer_choice.configure(values=self.registry.get_printers())
+            if first_update and self.registry.version > 0:
+                self.printer_choice.set(self.registry.default_printer or "")
+        self.after(500, self.update_printers)
 
     def get_printer(self):
         """
@@ -393,6 +525,6 @@ class PrinterChoiceFrame(customtkinter.CTkFrame):
         :return: The printer to use if it exists, None otherwise
         """
         choice = self.printer_choice.get()
-        if choice in [p[2] for p in win32print.EnumPrinters(2)]:
+        if choice in self.registry:
             return choice
         return None
@@ -0,0 +1,124 @@
+"""
+Input latency check of the GUI while stickers are generated: python -m UI.latency_check --jobs 20 --max-ms 100
+Opens the App, displays a sticker and queues jobs back to back in its GenerationScheduler, their progress goes through
+its UIChannel to its generation queue, and measures the delay of the Tk main loop with a LatencyProbe (needs a display)
+Exits with 1 if the 95th percentile of the delay is over the budget or a job failed
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from UI.gui import App
+from UI.latency_probe import LatencyProbe
+from sticker.sticker_model import get_loader
+
+CHECK_DONE_INTERVAL = 100
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m UI.latency_check",
+                                     description="Measure the input latency of the GUI during generations")
+    parser.add_argument("--jobs", type=int, default=20, help="number of jobs queued back to back (default: 20)")
+    parser.add_argument("--stickers", type=int, help="number of stickers per job (default: a full page)")
+    parser.add_argument("--model", default=os.path.join("model", "data.json"), help="sticker model to use")
+    parser.add_argument("--max-ms", type=float, default=100,
+                        help="budget of the 95th percentile of the latency in milliseconds (default: 100)")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.max_ms <= 0:
+        parser.error("--max-ms must be positive")
+    return args
+
+
+def get_sample_values(sticker, i):
+    """
+    Get valid values for a sticker, different for each job so that nothing is taken from the caches
+    :param sticker: Sticker type
+    :param i: Number of the job
+    :return: The values by data name
+    """
+    from sticker.sticker_data import StickerDataDate, StickerDataList, StickerDataNumber
+
+    values = {}
+    for data in sticker.data:
+        if isinstance(data, StickerDataNumber):
+            values[data.name] = str(20 + i % 30)
+        elif isinstance(data, StickerDataDate):
+            values[data.name] = "%02d/01/2024" % (1 + i % 28)
+        elif isinstance(data, StickerDataList):
+            values[data.name] = data.values[0]
+        else:
+            values[data.name] = "Test %d" % i
+    return values
+
+
+def main(argv=None):
+    """
+    Run the check and print the measured latency
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code: 0 if the latency is within the budget, 1 if it is not or a job failed, 2 if no sticker type is
+             usable
+    """
+    args = parse_args(argv)
+    model_loader = get_loader(args.model)
+    stickers = model_loader.load()
+    if not stickers.stickers_list:
+        for path, message in stickers.get_unusable_errors():
+            print("error: %s%s: %s" % (args.model, path, message), file=sys.stderr)
+        return 2
+    sticker = stickers.stickers_list[0]
+
+    app = App(stickers, model_loader)
+    app.display_sticker(sticker.name)
+    probe = LatencyProbe(app)
+    work_directory = tempfile.mkdtemp()
+    jobs = []
+
+    def submit_jobs():
+        probe.start()
+        for i in range(args.jobs):
+            # The pdf cache is not used, a job copied from the cache of a previous run would measure nothing
+            jobs.append(app.scheduler.submit(sticker, sticker.validate(get_sample_values(sticker, i)),
+                                             os.path.join(work_directory, "job_%d.pdf" % i),
+                                             stickers_left=0, total_stickers=args.stickers, use_pdf_cache=False))
+        app.after(CHECK_DONE_INTERVAL, check_done)
+
+    def check_done():
+        if any(job.is_active() for job in jobs):
+            app.after(CHECK_DONE_INTERVAL, check_done)
+        else:
+            app.quit()
+
+    try:
+        app.after(100, submit_jobs)
+        app.mainloop()
+        stats = probe.stop()
+        app.scheduler.close()
+        app.print_queue.close()
+        app.ui_channel.close()
+        app.destroy()
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    failed = sum(1 for job in jobs if job.error is not None)
+    print("%d jobs (%d failed), %d measures: median %.1f ms, p95 %.1f ms, max %.1f ms"
+          % (len(jobs), failed, stats['count'], stats['median'], stats['p95'], stats['max']))
+    if stats['p95'] > args.max_ms:
+        print("error: p95 latency %.1f ms over the budget of %.1f ms" % (stats['p95'], args.max_ms), file=sys.stderr)
+        return 1
+    if failed:
+        print("error: %d jobs failed" % failed, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import statistics
+import time
+
+
+class LatencyProbe:
+    """
+    Measures the responsiveness of the Tk main loop: a callback is scheduled every interval and the delay between the
+    time it should run and the time it runs is recorded. A click or a key press waits in the same event loop, so this is
+    the input latency of the window
+    """
+    def __init__(self, widget, interval=20):
+        """
+        LatencyProbe constructor
+        :param widget: Widget of which the main loop is measured
+        :param interval: Time in milliseconds between two measures
+        :return: None
+        """
+        self.widget = widget
+        self.interval = interval
+        self.delays = []
+        self.running = False
+        self.expected_time = None
+
+    def start(self):
+        """
+        Starts measuring
+        :return: None
+        """
+        self.delays = []
+        self.running = True
+        self.schedule()
+
+    def stop(self):
+        """
+        Stops measuring
+        :return: The statistics of the measured delays (see get_stats)
+        """
+        self.running = False
+        return self.get_stats()
+
+    def schedule(self):
+        """
+        Schedules the next measure
+        :return: None
+        """
+        self.expected_time = time.perf_counter() + self.interval / 1000
+        self.widget.after(self.interval, self.tick)
+
+    def tick(self):
+        """
+        Records the delay of the measure and schedules the next one (main thread)
+        :return: None
+        """
+        if not self.running:
+            return
+        self.delays.append(max(0.0, time.perf_counter() - self.expected_time))
+        self.schedule()
+
+    def get_stats(self):
+        """
+        Get the statistics of the measured delays
+        :return: Dict with the number of measures and the median, 95th percentile and maximum delay in milliseconds
+        """
+        if not self.delays:
+            return {'count': 0, 'median': 0.0, 'p95': 0.0, 'max': 0.0}
+        delays = sorted(self.delays)
+        return {
+            'count': len(delays),
+            'median': 1000 * statistics.median(delays),
+            'p95': 1000 * delays[min(len(delays) - 1, int(0.95 * len(delays)))],
+            'max': 1000 * delays[-1],
+        }
@@ -0,0 +1,59 @@
+import queue
+import time
+
+
+class UIChannel:
+    """
+    Channel carrying calls from the worker threads to the Tk main thread: the workers post the calls (progress, results,
+    error dialogs), the main loop runs them periodically with after(), so the widgets are only ever touched by the main
+    thread
+    """
+    def __init__(self, widget, interval=20, time_budget=0.01):
+        """
+        UIChannel constructor, starts draining the channel
+        :param widget: Widget of which the main loop runs the calls
+        :param interval: Time in milliseconds between two drains of the channel
+        :param time_budget: Time in seconds after which a drain stops, the remaining calls wait for the next drain so
+                            that the input events are handled in between
+        :return: None
+        """
+        self.widget = widget
+        self.interval = interval
+        self.time_budget = time_budget
+        self.calls = queue.SimpleQueue()
+        self.closed = False
+        self.widget.after(self.interval, self.drain)
+
+    def post(self, function, *args):
+        """
+        Queues a call to run in the main thread, can be called from any thread and never waits
+        :param function: Function to call
+        :param args: Arguments of the call
+        :return: None
+        """
+        self.calls.put((function, args))
+
+    def drain(self):
+        """
+        Runs the queued calls, in order, until the channel is empty or the time budget is spent (main thread)
+        :return: None
+        """
+        end_time = time.perf_counter() + self.time_budget
+        while time.perf_counter() < end_time:
+            try:
+                function, args = self.calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                function(*args)
+            except Exception as e:
+                print(e)
+        if not self.closed:
+            self.widget.after(self.interval, self.drain)
+
+    def close(self):
+        """
+        Stops draining the channel
+        :return: None
+        """
+        self.closed = True
@@ -60,3 +60,13 @@ class DateEntry(customtkinter.CTkFrame):
         :return: The value of the entry field
         """
         return self.entry.get()
+
+    def set(self, value):
+        """
+        Set the value of the entry field
+        :param value: Value to set
+        :return: None
+        """
+        self.entry.delete(0, "end")
+        if value:
+            self.entry.insert(0, value)
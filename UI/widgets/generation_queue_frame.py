@@ -0,0 +1,82 @@
+import customtkinter
+
+from UI.widgets.pdf_gen_progress_bar import StickerGenProgressBar
+from sticker.generation_scheduler import GenerationJobStates
+from sticker.generation_state import StickerGenerationStates
+
+JOB_STATE_TEXTS = {
+    GenerationJobStates.QUEUED: "En attente",
+    GenerationJobStates.RUNNING: "En cours",
+    GenerationJobStates.DONE: "Terminé",
+    GenerationJobStates.FAILED: "Erreur",
+    GenerationJobStates.CANCELLED: "Annulé",
+}
+
+
+class GenerationQueueFrame(customtkinter.CTkScrollableFrame):
+    """
+    Class to represent the list of the generation jobs, with their progress and a button to cancel them
+    """
+    def __init__(self, parent, scheduler, **kwargs):
+        """
+        GenerationQueueFrame constructor
+        :param parent: Parent frame
+        :param scheduler: GenerationScheduler of which the jobs are displayed
+        :param kwargs: Keyword arguments for the customtkinter.CTkScrollableFrame class
+        :return: None
+        """
+        super().__init__(parent, **kwargs)
+        self.scheduler = scheduler
+        self.rows = {}
+
+    def update_job(self, job):
+        """
+        Show the new state or progress of a job, and forget the jobs the scheduler forgot (main thread, the workers post
+        their changes through a UIChannel)
+        :param job: Job that changed
+        :return: None
+        """
+        if job.id not in self.rows:
+            self.rows[job.id] = self.create_row(job)
+        self.update_row(self.rows[job.id], job)
+
+        job_ids = {job.id for job in self.scheduler.get_jobs()}
+        for job_id in [job_id for job_id in self.rows if job_id not in job_ids]:
+            self.rows.pop(job_id)['frame'].destroy()
+
+    def create_row(self, job):
+        """
+        Create the widgets of a job
+        :param job: Job to display
+        :return: The widgets of the row, by name
+        """
+        frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        frame.pack(fill="x", pady=(0, 4))
+        frame.grid_columnconfigure(0, weight=1)
+        label = customtkinter.CTkLabel(frame, text="", font=("Calibri", 12), anchor="w")
+        label.grid(row=0, column=0, sticky="ew")
+        button = customtkinter.CTkButton(frame, text="Annuler", width=50, height=20, font=("Calibri", 12),
+                                         command=lambda: self.scheduler.cancel(job))
+        button.grid(row=0, column=1, rowspan=2, padx=(4, 0))
+        progress_bar = StickerGenProgressBar(frame, height=6)
+        progress_bar.grid(row=1, column=0, sticky="ew")
+        return {'frame': frame, 'label': label, 'button': button, 'progress_bar': progress_bar, 'state': None,
+                'progress': None}
+
+    def update_row(self, row, job):
+        """
+        Update the widgets of a job
+        :param row: Widgets of the row of the job
+        :param job: Job displayed in the row
+        :return: None
+        """
+        state = job.state
+        row['label'].configure(text="%s: %s" % (job.sticker.name, JOB_STATE_TEXTS[state]))
+        progress = job.progress if state != GenerationJobStates.DONE else StickerGenerationStates.DONE
+        if progress != row['progress']:
+            row['progress'] = progress
+            row['progress_bar'].set_state(progress)
+        if state != row['state']:
+            row['state'] = state
+            if not job.is_active():
+                row['button'].grid_remove()
@@ -1,41 +1,67 @@
-from enum import Enum
+from collections import deque
 
 import customtkinter
 
+from sticker.generation_state import StickerGenerationStates
+
 
 class StickerGenProgressBar(customtkinter.CTkProgressBar):
     """
     Class to represent a progress bar for the sticker generation process
     """
-    class StickerProgressBarStates(float, Enum):
-        """
-        Enum to represent the different states of the progress bar
-        """
-        STARTING = 0.1,
-        GENERATING_IMG = 0.2,
-        GENERATING_PDF = 0.6,
-        DELETING_IMG = 0.8,
-        DONE = 1
+    StickerProgressBarStates = StickerGenerationStates
 
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, min_state_duration=150, **kwargs):
         """
         StickerGenProgressBar constructor
         :param parent: Parent frame
+        :param min_state_duration: Minimum time in milliseconds during which each state stays on screen
         :param kwargs: Keyword arguments for the customtkinter.CTkProgressBar class
         :return: None
         """
         super().__init__(parent, **kwargs)
+        self.min_state_duration = min_state_duration
+        self.pending_states = deque()
+        self.displaying = False
+        self.closing = False
         self.set(self.StickerProgressBarStates.STARTING.value)
-        self.update()
 
     def set_state(self, state):
         """
-        Set the state of the progress bar
+        Set the state of the progress bar, from the main thread (the worker threads post their states through a
+        UIChannel)
+        The state is queued and displayed by the Tk event loop, so the caller never waits for the minimum display time
+        of the previous state
         :param state: State to set the progress bar to
         :return: None
         """
-        self.set(state.value)
-        self.update()
+        self.pending_states.append(state)
+        if not self.displaying:
+            self.displaying = True
+            self.after(0, self.display_next_state)
+
+    def display_next_state(self):
+        """
+        Display the next queued state and schedule the following one after the minimum display time
+        :return: None
+        """
+        if not self.pending_states:
+            self.displaying = False
+            if self.closing:
+                self.destroy()
+            return
+
+        self.set(self.pending_states.popleft().value)
+        self.after(self.min_state_duration, self.display_next_state)
+
+    def close(self):
+        """
+        Destroy the progress bar once all the queued states have been displayed
+        :return: None
+        """
+        self.closing = True
+        if not self.displaying:
+            self.destroy()
 
     def destroy(self):
         """
@@ -1,11 +1,10 @@
-import json
 import os
 import locale
 
+from CTkMessagebox import CTkMessagebox
+
 from UI.gui import App
-from sticker.stickers import Stickers
-from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
-from sticker.sticker_type import StickerType
+from sticker.sticker_model import get_loader
 
 
 def empty_tmp():
@@ -25,58 +24,35 @@ def set_locale():
     locale.setlocale(locale.LC_TIME, '')
 
 
+def get_model_loader():
+    """
+    Get the loader of the data.json file
+    :return: The StickerModelLoader of the file
+    """
+    return get_loader('model/data.json')
+
+
 def get_stickers():
     """
     Get the stickers from the data.json file and create the Stickers object
     :return: The Stickers object
     """
-    data = json.load(open('model/data.json', encoding='utf-8-sig'))
-
-    stickers = Stickers()
-    for sticker in data:
-        datas = []
-        for data in sticker['data']:
-            if data['type'] == 'number':
-                datas.append(StickerDataNumber(data['name'],
-                                               inlineprefix=data['inline_prefix'],
-                                               inlinesuffix=data['inline_suffix'],
-                                               blockprefix=data['block_prefix'],
-                                               blocksuffix=data['block_suffix'],
-                                               font=data['font'],
-                                               prefixfont=data['prefix_font'],
-                                               suffixfont=data['suffix_font']))
-            elif data['type'] == 'text':
-                datas.append(StickerDataText(data['name'],
-                                             inlineprefix=data['inline_prefix'],
-                                             inlinesuffix=data['inline_suffix'],
-                                             blockprefix=data['block_prefix'],
-                                             blocksuffix=data['block_suffix'],
-                                             font=data['font'],
-                                             prefixfont=data['prefix_font'],
-                                             suffixfont=data['suffix_font']))
-            elif data['type'] == 'date':
-                datas.append(StickerDataDate(data['name'],
-                                             inlineprefix=data['inline_prefix'],
-                                             inlinesuffix=data['inline_suffix'],
-                                             blockprefix=data['block_prefix'],
-                                             blocksuffix=data['block_suffix'],
-                                             font=data['font'],
-                                             prefixfont=data['prefix_font'],
-                                             suffixfont=data['suffix_font']))
-            elif data['type'] == 'list':
-                datas.append(StickerDataList(data['name'],
-                                             data['values'],
-                                             inlineprefix=data['inline_prefix'],
-                                             inlinesuffix=data['inline_suffix'],
-                                             blockprefix=data['block_prefix'],
-                                             blocksuffix=data['block_suffix'],
-                                             font=data['font'],
-                                             prefixfont=data['prefix_font'],
-                                             suffixfont=data['suffix_font']))
-
-        stickers.add_sticker(StickerType(sticker['name'], datas, align=sticker['align']))
-
-    return stickers
+    return get_model_loader().load()
+
+
+def show_model_errors(model_path, errors):
+    """
+    Show the errors of an invalid model file, the application can not start without stickers
+    :param model_path: Path to the model file
+    :param errors: List of (path in the model, message)
+    :return: None
+    """
+    for path, message in errors:
+        print("%s%s: %s" % (model_path, path, message))
+    CTkMessagebox(title="Erreur",
+                  message="Le fichier des autocollants (" + model_path + ") contient des erreurs, l'application ne "
+                          "peut pas démarrer.\n" + "\n".join(path + " : " + message for path, message in errors[:5]),
+                  icon="cancel").get()
 
 
 def main():
@@ -86,8 +62,14 @@ def main():
     """
     set_locale()
     empty_tmp()
-    stickers = get_stickers()
-    app = App(stickers)
+    try:
+        stickers = get_stickers()
+    except Exception as e:
+        if not e.args or e.args[0] != "Invalid model":
+            raise
+        show_model_errors(e.args[1], e.args[2])
+        return
+    app = App(stickers, get_model_loader())
     app.mainloop()
 
 
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+# PyMuPDF is AGPL-3.0 licensed, see requirements.txt
+try:
+    import pymupdf
+except ImportError:
+    try:
+        import fitz as pymupdf
+    except ImportError:
+        pymupdf = None
+
+
+def can_merge_pdfs():
+    """
+    Check if pdf files can be merged (pymupdf is installed)
+    :return: True if merge_pdfs can be used
+    """
+    return pymupdf is not None
+
+
+def merge_pdfs(file_paths, directory=None):
+    """
+    Merges pdf files into a new temporary pdf file, the pages in the order of the files
+    :param file_paths: Paths to the pdf files to merge
+    :param directory: Directory of the merged file | None for the temporary directory of the system
+    :return: Path of the merged pdf file (to delete once it is printed)
+    :raises Exception: If pymupdf is not installed or a file can not be read
+    """
+    if pymupdf is None:
+        raise Exception("Merging pdfs needs pymupdf")
+
+    fd, merged_path = tempfile.mkstemp(prefix="merged_", suffix=".pdf", dir=directory)
+    os.close(fd)
+    try:
+        with pymupdf.open() as merged_pdf:
+            for file_path in file_paths:
+                with pymupdf.open(file_path) as pdf:
+                    merged_pdf.insert_pdf(pdf)
+            merged_pdf.save(merged_path, garbage=1, deflate=True)
+    except Exception:
+        os.remove(merged_path)
+        raise
+    return merged_path
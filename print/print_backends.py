@@ -0,0 +1,182 @@
+import os
+import shutil
+import subprocess
+import time
+from abc import ABC, abstractmethod
+
+
+class PrintBackend(ABC):
+    """
+    Base class for the ways to hand pdf files to the print spooler (Abstract class)
+    """
+    name = None
+    # True if print_files prints several files as a single job, otherwise the Printer merges them into one pdf first
+    single_job = False
+
+    @abstractmethod
+    def print_files(self, file_paths, printer_name):
+        """
+        Hands pdf files to the spooler, returns once the spooler has them (the files can then be deleted)
+        :param file_paths: Paths to the pdf files to print
+        :param printer_name: Name of the printer to print to
+        :return: None
+        :raises Exception: If the files could not be handed to the spooler
+        """
+
+
+class CommandPrintBackend(PrintBackend):
+    """
+    Prints by running a command, as a list of arguments: "{printer}" is replaced by the printer name and "{file}" by the
+    pdf to print (one command per pdf) or "{files}" by all the pdfs to print (one command, i.e. one job, for all the pdfs)
+    """
+    name = "command"
+
+    def __init__(self, command):
+        """
+        CommandPrintBackend constructor
+        :param command: Print command as a list of arguments
+        :return: None
+        """
+        self.command = command
+        self.single_job = "{files}" in command
+
+    def print_files(self, file_paths, printer_name):
+        """
+        Runs the print commands of pdf files
+        :param file_paths: Paths to the pdf files to print
+        :param printer_name: Name of the printer to print to
+        :return: None
+        :raises Exception: If a print command fails
+        """
+        for command in self.get_commands(file_paths, printer_name):
+            return_code = subprocess.call(command)
+            if return_code != 0:
+                raise Exception("Print command failed", command[0], return_code)
+
+    def get_commands(self, file_paths, printer_name):
+        """
+        Get the print commands printing files
+        :param file_paths: Paths to the pdf files to print
+        :param printer_name: Name of the printer to use
+        :return: List of the commands to run, each as a list of arguments
+        """
+        if "{files}" in self.command:
+            commands = [[]]
+            for argument in self.command:
+                if argument == "{files}":
+                    commands[0].extend(file_paths)
+                else:
+                    commands[0].append(argument.replace("{printer}", printer_name or ""))
+            return commands
+
+        return [[argument.replace("{printer}", printer_name or "").replace("{file}", file_path)
+                 for argument in self.command]
+                for file_path in file_paths]
+
+
+class ViewerPrintBackend(CommandPrintBackend):
+    """
+    Prints with the PDF-XChange viewer (/printto), one viewer process per pdf (the pdfs printed together are merged
+    into one pdf by the Printer, so they are printed by a single viewer process, see Printer.print_files)
+    """
+    name = "viewer"
+
+    def __init__(self, viewer_path=None):
+        """
+        ViewerPrintBackend constructor
+        :param viewer_path: Path of the viewer executable | default: see get_viewer_path
+        :return: None
+        """
+        self.viewer_path = viewer_path or ViewerPrintBackend.get_viewer_path()
+        super().__init__([self.viewer_path, "/printto:default=no", "{printer}", "{file}"])
+
+    @staticmethod
+    def get_viewer_path():
+        """
+        Get the path of the PDF-XChange viewer executable
+        The viewer is in the directory written in config/viewer_path.txt, in the working directory if the file is empty
+        :return: The path of the viewer executable
+        """
+        viewer_config_file_path = os.path.join(os.getcwd(), "config", "viewer_path.txt")
+        viewer_directory = os.getcwd()
+        if os.path.isfile(viewer_config_file_path):
+            with open(viewer_config_file_path, "r") as f:
+                text = f.read().strip()
+                if text != "":
+                    viewer_directory = text
+
+        return os.path.join(viewer_directory, "PDF-XChangeViewerPortable", "PDF-XChangeViewerPortable.exe")
+
+
+class LpPrintBackend(CommandPrintBackend):
+    """
+    Hands the pdfs straight to the CUPS spooler with lp, all the pdfs printed together in one job (no viewer)
+    """
+    name = "lp"
+
+    def __init__(self):
+        """
+        LpPrintBackend constructor
+        :return: None
+        """
+        super().__init__(["lp", "-s", "-d", "{printer}", "--", "{files}"])
+
+
+class LprPrintBackend(CommandPrintBackend):
+    """
+    Hands the pdfs straight to the spooler with the BSD lpr command (no viewer)
+    """
+    name = "lpr"
+
+    def __init__(self):
+        """
+        LprPrintBackend constructor
+        :return: None
+        """
+        super().__init__(["lpr", "-P", "{printer}", "{files}"])
+
+
+class FileDropPrintBackend(PrintBackend):
+    """
+    Stand-in spooler: the pdfs are copied to a directory per printer (e.g. to test printing without printers, or for a
+    printer watching a hot folder), the pdfs printed together are merged into one pdf by the Printer
+    """
+    name = "filedrop"
+
+    def __init__(self, directory=os.path.join("tmp", "spool")):
+        """
+        FileDropPrintBackend constructor
+        :param directory: Directory in which a directory per printer receives the pdfs
+        :return: None
+        """
+        self.directory = directory
+
+    def print_files(self, file_paths, printer_name):
+        """
+        Copies pdf files to the directory of the printer, each file appears complete (copied then renamed)
+        :param file_paths: Paths to the pdf files to print
+        :param printer_name: Name of the printer to print to
+        :return: None
+        :raises OSError: If a file could not be copied
+        """
+        printer_directory = os.path.join(self.directory, printer_name or "default")
+        os.makedirs(printer_directory, exist_ok=True)
+        for file_path in file_paths:
+            name = "%d_%s" % (time.time_ns(), os.path.basename(file_path))
+            tmp_path = os.path.join(printer_directory, "." + name + ".tmp")
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, os.path.join(printer_directory, name))
+
+
+def get_default_print_backend():
+    """
+    Get the print backend of the system: the viewer on Windows, lp or lpr when available, the file drop otherwise
+    :return: The PrintBackend to use
+    """
+    if os.name == "nt":
+        return ViewerPrintBackend()
+    if shutil.which("lp"):
+        return LpPrintBackend()
+    if shutil.which("lpr"):
+        return LprPrintBackend()
+    return FileDropPrintBackend()
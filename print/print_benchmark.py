@@ -0,0 +1,139 @@
+"""
+Benchmark of the print backends: python -m print.print_benchmark --printer NAME --jobs 20 --pdf stickers.pdf
+Measures, for each available backend, the time from queuing a pdf to the spooler having it (end-to-end time to spool),
+with each job printed alone and with the jobs coalesced by the print queue
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from print.print_backends import FileDropPrintBackend, LpPrintBackend, LprPrintBackend, ViewerPrintBackend, \
+    CommandPrintBackend
+from print.print_queue import PrintQueue, PrintJobStates
+from print.printer import Printer
+from print.printer_registry import FakePrinterBackend, PrinterRegistry
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m print.print_benchmark", description="Benchmark the print backends")
+    parser.add_argument("--printer", default="benchmark", help="printer to print to (default: benchmark)")
+    parser.add_argument("--pdf", help="pdf to print (default: a one page pdf)")
+    parser.add_argument("--jobs", type=int, default=20, help="number of jobs per backend and mode (default: 20)")
+    parser.add_argument("--backend", action="append", choices=("filedrop", "lp", "lpr", "viewer"),
+                        help="backend to benchmark, can be repeated (default: all the available ones)")
+    parser.add_argument("--command", action="append", default=[], metavar="COMMAND",
+                        help="print command to benchmark too, arguments separated by spaces with {printer} and "
+                             "{file} or {files} (e.g. a stand-in executable), can be repeated")
+    return parser.parse_args(argv)
+
+
+def write_sample_pdf(path):
+    """
+    Write a one page pdf to print
+    :param path: Path of the pdf
+    :return: None
+    """
+    from reportlab.pdfgen.canvas import Canvas
+
+    canvas = Canvas(path)
+    canvas.drawString(100, 700, "Print backend benchmark")
+    canvas.save()
+
+
+def get_backends(args, spool_directory):
+    """
+    Get the backends to benchmark, the ones whose program is missing are skipped
+    :param args: Parsed arguments
+    :param spool_directory: Directory of the file drop backend
+    :return: List of (name, PrintBackend)
+    """
+    names = args.backend or ["filedrop", "lp", "lpr", "viewer"]
+    backends = []
+    for name in names:
+        if name == "filedrop":
+            backends.append((name, FileDropPrintBackend(spool_directory)))
+        elif name == "lp" and shutil.which("lp"):
+            backends.append((name, LpPrintBackend()))
+        elif name == "lpr" and shutil.which("lpr"):
+            backends.append((name, LprPrintBackend()))
+        elif name == "viewer" and os.name == "nt" and os.path.isfile(ViewerPrintBackend.get_viewer_path()):
+            backends.append((name, ViewerPrintBackend()))
+        else:
+            print("%s: not available, skipped" % name, file=sys.stderr)
+    for command in args.command:
+        backends.append((command, CommandPrintBackend(command.split())))
+    return backends
+
+
+def run_jobs(backend, printer_name, pdf_path, jobs, coalesce_delay):
+    """
+    Prints copies of a pdf through a print queue and measures the time to spool of each job
+    :param backend: PrintBackend to print with
+    :param printer_name: Name of the printer
+    :param pdf_path: Pdf to print
+    :param jobs: Number of jobs
+    :param coalesce_delay: Coalescing delay of the print queue
+    :return: (time to spool of each job in seconds, total time in seconds, number of failed jobs)
+    """
+    registry = PrinterRegistry(FakePrinterBackend([printer_name]))
+    printer = Printer(printer_name, backend=backend, registry=registry)
+    print_queue = PrintQueue(printer, coalesce_delay=coalesce_delay)
+
+    directory = tempfile.mkdtemp()
+    try:
+        start_time = time.perf_counter()
+        submitted = []
+        for i in range(jobs):
+            job_path = os.path.join(directory, "job_%d.pdf" % i)
+            shutil.copyfile(pdf_path, job_path)
+            submitted.append(print_queue.submit(job_path, delete_file=True))
+            if coalesce_delay == 0:
+                print_queue.wait()
+        print_queue.wait()
+        total_time = time.perf_counter() - start_time
+        print_queue.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    failed = sum(1 for job in submitted if job.state == PrintJobStates.FAILED)
+    return [job.done_time - job.queued_time for job in submitted], total_time, failed
+
+
+def main(argv=None):
+    """
+    Run the benchmark and print the results
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code
+    """
+    args = parse_args(argv)
+    work_directory = tempfile.mkdtemp()
+    try:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = os.path.join(work_directory, "sample.pdf")
+            write_sample_pdf(pdf_path)
+
+        print("%-20s %-10s %6s %12s %12s %10s %7s" % ("backend", "mode", "jobs", "median (ms)", "max (ms)",
+                                                       "total (s)", "failed"))
+        for name, backend in get_backends(args, os.path.join(work_directory, "spool")):
+            for mode, coalesce_delay in (("one by one", 0), ("coalesced", 0.2)):
+                durations, total_time, failed = run_jobs(backend, args.printer, pdf_path, args.jobs, coalesce_delay)
+                print("%-20s %-10s %6d %12.1f %12.1f %10.3f %7d" % (name, mode, args.jobs,
+                                                                  1000 * statistics.median(durations),
+                                                                  1000 * max(durations), total_time, failed))
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
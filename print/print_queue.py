@@ -0,0 +1,193 @@
+import os
+import queue
+import time
+from enum import Enum
+from threading import Lock, Thread
+
+
+class PrintJobStates(Enum):
+    """
+    Enum for the states of a print job
+    """
+    QUEUED = "queued"
+    SPOOLING = "spooling"
+    SPOOLED = "spooled"
+    FAILED = "failed"
+
+
+class PrintJob:
+    """
+    Class to represent a pdf waiting to be printed or printed by a PrintQueue
+    """
+    def __init__(self, file_path, printer_name, delete_file=False):
+        """
+        PrintJob constructor
+        :param file_path: Path to the pdf file to print
+        :param printer_name: Name of the printer to print to
+        :param delete_file: True to delete the file once it was handed to the spooler (or the job failed)
+        :return: None
+        """
+        self.file_path = file_path
+        self.printer_name = printer_name
+        self.delete_file = delete_file
+        self.state = PrintJobStates.QUEUED
+        self.error = None
+        self.queued_time = time.perf_counter()
+        self.done_time = None
+
+
+class PrintQueue:
+    """
+    Queue of print jobs printed one after the other by a single worker thread
+    The jobs queued close together (within coalesce_delay of the first one) are printed together: one job with all their
+    files per printer (see Printer.print_files)
+    """
+    def __init__(self, printer, coalesce_delay=0.5, state_callback=None, max_done_jobs=100):
+        """
+        PrintQueue constructor, starts the worker thread
+        :param printer: Printer used to print the jobs
+        :param coalesce_delay: Time in seconds to wait for more jobs to print with the first queued job
+        :param state_callback: Callback function called with the job when a job changes state (from the worker thread)
+        :param max_done_jobs: Number of spooled or failed jobs kept in the job list
+        :return: None
+        """
+        self.printer = printer
+        self.coalesce_delay = coalesce_delay
+        self.state_callback = state_callback
+        self.max_done_jobs = max_done_jobs
+        self.pending_jobs = queue.Queue()
+        self.jobs = []
+        self.jobs_lock = Lock()
+        self.worker = Thread(target=self.run, name="print-queue", daemon=True)
+        self.worker.start()
+
+    def submit(self, file_path, delete_file=False, printer_name=None):
+        """
+        Queues a pdf file to print
+        :param file_path: Path to the pdf file to print
+        :param delete_file: True to delete the file once it was handed to the spooler (e.g. a temporary file)
+        :param printer_name: Name of the printer to print to | None for the printer selected now in the Printer
+        :return: The PrintJob of the file
+        """
+        job = PrintJob(file_path, printer_name or self.printer.printer_name, delete_file)
+        with self.jobs_lock:
+            self.jobs.append(job)
+        self.pending_jobs.put(job)
+        return job
+
+    def get_jobs(self, states=None):
+        """
+        Get the jobs of the queue
+        :param states: States of the jobs to get | None for all the jobs
+        :return: List of the jobs, in queuing order
+        """
+        with self.jobs_lock:
+            return [job for job in self.jobs if states is None or job.state in states]
+
+    def wait(self, timeout=None):
+        """
+        Waits until all the queued jobs are spooled or failed
+        :param timeout: Maximum time to wait in seconds | None to wait without limit
+        :return: True if all the jobs are done, False if the timeout expired
+        """
+        end_time = None if timeout is None else time.perf_counter() + timeout
+        while self.get_jobs((PrintJobStates.QUEUED, PrintJobStates.SPOOLING)):
+            if end_time is not None and time.perf_counter() > end_time:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        """
+        Stops the worker thread once the queued jobs are printed
+        :return: None
+        """
+        self.pending_jobs.put(None)
+        self.worker.join()
+
+    def run(self):
+        """
+        Worker thread: takes the queued jobs, with the jobs queued shortly after them, and prints them
+        :return: None
+        """
+        while True:
+            job = self.pending_jobs.get()
+            if job is None:
+                return
+
+            jobs = [job]
+            stop = False
+            end_time = time.perf_counter() + self.coalesce_delay
+            while True:
+                try:
+                    next_job = self.pending_jobs.get(timeout=max(0.0, end_time - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if next_job is None:
+                    stop = True
+                    break
+                jobs.append(next_job)
+
+            self.print_jobs(jobs)
+            if stop:
+                return
+
+    def print_jobs(self, jobs):
+        """
+        Prints jobs, grouped by printer
+        :param jobs: Jobs to print
+        :return: None
+        """
+        jobs_by_printer = {}
+        for job in jobs:
+            if os.path.isfile(job.file_path):
+                jobs_by_printer.setdefault(job.printer_name, []).append(job)
+            else:
+                # a missing file must not make the other jobs printed with it fail
+                job.error = FileNotFoundError("File not found: " + job.file_path)
+                self.finish_jobs([job], PrintJobStates.FAILED)
+
+        for printer_name, printer_jobs in jobs_by_printer.items():
+            for job in printer_jobs:
+                self.set_job_state(job, PrintJobStates.SPOOLING)
+            try:
+                self.printer.print_files([job.file_path for job in printer_jobs], printer_name)
+                state = PrintJobStates.SPOOLED
+            except Exception as e:
+                print(e)
+                for job in printer_jobs:
+                    job.error = e
+                state = PrintJobStates.FAILED
+            self.finish_jobs(printer_jobs, state)
+
+        with self.jobs_lock:
+            done_jobs = [job for job in self.jobs if job.done_time is not None]
+            forgotten_jobs = set(map(id, done_jobs[:max(0, len(done_jobs) - self.max_done_jobs)]))
+            self.jobs = [job for job in self.jobs if id(job) not in forgotten_jobs]
+
+    def finish_jobs(self, jobs, state):
+        """
+        Ends jobs: deletes their file if asked and sets their final state
+        :param jobs: Jobs that are done
+        :param state: Final state of the jobs (spooled or failed)
+        :return: None
+        """
+        for job in jobs:
+            if job.delete_file:
+                try:
+                    os.remove(job.file_path)
+                except OSError:
+                    pass
+            job.done_time = time.perf_counter()
+            self.set_job_state(job, state)
+
+    def set_job_state(self, job, state):
+        """
+        Changes the state of a job and calls the state callback
+        :param job: Job of which the state changes
+        :param state: New state of the job
+        :return: None
+        """
+        job.state = state
+        if self.state_callback is not None:
+            self.state_callback(job)
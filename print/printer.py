@@ -1,59 +1,89 @@
 import os
-import win32print
-import subprocess
+import warnings
+
+from print.pdf_merge import can_merge_pdfs, merge_pdfs
+from print.print_backends import get_default_print_backend
+from print.printer_registry import PrinterRegistry
 
 
 class Printer:
     """
     Class for printing PDF files
     """
-    def __init__(self, printer_name=None):
+    def __init__(self, printer_name=None, backend=None, registry=None):
         """
         Printer class constructor
         :param printer_name: Name of the printer to use | None for default printer
+        :param backend: PrintBackend handing the pdfs to the spooler | default: the backend of the system (see
+                        get_default_print_backend)
+        :param registry: PrinterRegistry of the printers that can be used | default: a registry of the system printers
         :return: None
         """
-        # check if viewer_path.txt is empty, if not use the path in it, else use the default path
-        viewer_config_file_path = os.path.join(os.getcwd(), "config\\viewer_path.txt")
-        self.viewer_directory = os.getcwd()
-        if os.path.isfile(viewer_config_file_path):
-            with open(viewer_config_file_path, "r") as f:
-                text = f.read()
-                if text != "":
-                    self.viewer_directory = text
-
-        self.viewer_path = self.viewer_directory.replace("\\", "\\\\") + "\\\\PDF-XChangeViewerPortable\\\\PDF" \
-                                                                         "-XChangeViewerPortable.exe"
+        self.backend = backend if backend is not None else get_default_print_backend()
+        self.registry = registry if registry is not None else PrinterRegistry()
 
         self.printer_name = None
         self.set_printer(printer_name)
 
     def set_printer(self, printer_name):
         """
-        Sets the printer to use
-        :param printer_name: Name of the printer to use | None for default printer
+        Sets the printer to use, never waits for the printers to be enumerated (the printer is not checked if they are
+        not enumerated yet)
+        :param printer_name: Name of the printer to use | None for default printer (also used if the printer does not
+                             exist)
         :return: None
         """
-        if printer_name is None or printer_name not in [p[2] for p in win32print.EnumPrinters(2)]:
-            self.printer_name = win32print.GetDefaultPrinter()
+        if printer_name is None or (self.registry.wait(0) and printer_name not in self.registry):
+            self.printer_name = None
         else:
             self.printer_name = printer_name
 
+    def get_printer_name(self, printer_name=None):
+        """
+        Get the name of the printer to print to, waiting for the printers to be enumerated to know the default printer
+        :param printer_name: Name of the printer | None for the printer of the Printer
+        :return: The name of the printer
+        """
+        return printer_name or self.printer_name or self.registry.get_default_printer()
+
     def print(self, file_path):
         """
         Prints a pdf file
         :param file_path: Path to the pdf file to print
         :return: None
         :raises FileNotFoundError: If the file does not exist
+        :raises Exception: If the file could not be handed to the spooler
         """
-        if not os.path.isfile(file_path):
-            raise FileNotFoundError("File not found: " + file_path)
-
-        script = "\"" + \
-                 self.viewer_path + \
-                 "\" /printto:default=no \"" + \
-                 self.printer_name + \
-                 "\" \"" + \
-                 file_path.replace("\\", "\\\\") + \
-                 "\""
-        subprocess.call(script, shell=True)
+        self.print_files([file_path])
+
+    def print_files(self, file_paths, printer_name=None):
+        """
+        Prints pdf files as a single job: handed together to the backends that print several files as one job (see
+        PrintBackend.single_job), merged into one pdf for the others (printed one by one, with a warning, if pymupdf is
+        not installed, see requirements.txt)
+        Returns once the files were handed to the spooler
+        :param file_paths: Paths to the pdf files to print
+        :param printer_name: Name of the printer to use | None for the printer of the Printer
+        :return: None
+        :raises FileNotFoundError: If a file does not exist
+        :raises Exception: If the files could not be merged ("PDF merge failed", error) or handed to the spooler
+        """
+        for file_path in file_paths:
+            if not os.path.isfile(file_path):
+                raise FileNotFoundError("File not found: " + file_path)
+
+        printer_name = self.get_printer_name(printer_name)
+        if len(file_paths) > 1 and not self.backend.single_job:
+            if can_merge_pdfs():
+                try:
+                    merged_path = merge_pdfs(file_paths)
+                except Exception as e:
+                    raise Exception("PDF merge failed", e)
+                try:
+                    self.backend.print_files([merged_path], printer_name)
+                finally:
+                    os.remove(merged_path)
+                return
+            warnings.warn("pymupdf is not installed, the %d pdfs are printed one by one" % len(file_paths))
+
+        self.backend.print_files(file_paths, printer_name)
@@ -0,0 +1,227 @@
+import shutil
+import subprocess
+import time
+import warnings
+from abc import ABC, abstractmethod
+from threading import Event, Lock, Thread
+
+try:
+    import win32print
+except ImportError:
+    win32print = None
+
+
+class PrinterBackend(ABC):
+    """
+    Base class for the ways to list the printers of the system (Abstract class)
+    """
+    @abstractmethod
+    def enumerate_printers(self):
+        """
+        List the printers, this can be slow (e.g. network printers)
+        :return: List of the printer names
+        """
+
+    @abstractmethod
+    def get_default_printer(self):
+        """
+        Get the default printer
+        :return: The name of the default printer | None if there is none
+        """
+
+
+class Win32PrinterBackend(PrinterBackend):
+    """
+    Printers of the Windows print spooler
+    """
+    def enumerate_printers(self):
+        """
+        List the printers of the Windows print spooler
+        :return: List of the printer names
+        """
+        return [p[2] for p in win32print.EnumPrinters(2)]
+
+    def get_default_printer(self):
+        """
+        Get the default printer of Windows
+        :return: The name of the default printer
+        """
+        return win32print.GetDefaultPrinter()
+
+
+class LpstatPrinterBackend(PrinterBackend):
+    """
+    Printers of the CUPS spooler, listed with lpstat
+    """
+    def enumerate_printers(self):
+        """
+        List the printers accepting jobs
+        :return: List of the printer names
+        """
+        output = subprocess.run(["lpstat", "-a"], capture_output=True, text=True).stdout
+        return [line.split()[0] for line in output.splitlines() if line.strip()]
+
+    def get_default_printer(self):
+        """
+        Get the default destination of CUPS
+        :return: The name of the default printer | None if there is none
+        """
+        output = subprocess.run(["lpstat", "-d"], capture_output=True, text=True).stdout
+        name = output.partition(":")[2].strip()
+        return name or None
+
+
+class FakePrinterBackend(PrinterBackend):
+    """
+    Fixed list of printers, e.g. to test without the printers of the system
+    """
+    def __init__(self, printers=(), default_printer=None, delay=0):
+        """
+        FakePrinterBackend constructor
+        :param printers: Names of the printers
+        :param default_printer: Name of the default printer | default: the first printer
+        :param delay: Time in seconds an enumeration takes, to simulate slow network printers
+        :return: None
+        """
+        self.printers = list(printers)
+        self.default_printer = default_printer or (self.printers[0] if self.printers else None)
+        self.delay = delay
+        self.enumerations = 0
+
+    def enumerate_printers(self):
+        """
+        List the printers, after the simulated delay
+        :return: List of the printer names
+        """
+        time.sleep(self.delay)
+        self.enumerations += 1
+        return list(self.printers)
+
+    def get_default_printer(self):
+        """
+        Get the default printer
+        :return: The name of the default printer
+        """
+        return self.default_printer
+
+
+def get_default_backend():
+    """
+    Get the printer backend of the system
+    :return: Win32PrinterBackend on Windows, LpstatPrinterBackend with CUPS, a FakePrinterBackend without printers
+             otherwise
+    """
+    if win32print is not None:
+        return Win32PrinterBackend()
+    if shutil.which("lpstat"):
+        return LpstatPrinterBackend()
+    return FakePrinterBackend()
+
+
+class PrinterRegistry:
+    """
+    Cache of the printers of the system, enumerated in a background thread so that the GUI never waits for it
+    The printers are enumerated again in the background when the cache is older than ttl, or on refresh
+    error is the exception of the last enumeration if it failed (the previous printers are kept), None otherwise
+    """
+    def __init__(self, backend=None, ttl=300):
+        """
+        PrinterRegistry constructor, starts the first enumeration in the background
+        :param backend: PrinterBackend listing the printers | default: the backend of the system
+        :param ttl: Time in seconds after which the printers are enumerated again on next use
+        :return: None
+        """
+        self.backend = backend if backend is not None else get_default_backend()
+        self.ttl = ttl
+        self.printers = []
+        self.printer_names = frozenset()
+        self.default_printer = None
+        self.loaded_time = None
+        self.version = 0
+        self.error = None
+        self.loaded = Event()
+        self.lock = Lock()
+        self.refresh_thread = None
+        self.refresh()
+
+    def __contains__(self, printer_name):
+        """
+        Check if a printer exists, from the cache (O(1), never waits for an enumeration)
+        :param printer_name: Name of the printer
+        :return: True if the printer was in the last enumeration
+        """
+        self.refresh_if_expired()
+        return printer_name in self.printer_names
+
+    def get_printers(self):
+        """
+        Get the printers from the cache (empty until the first enumeration is done)
+        :return: List of the printer names
+        """
+        self.refresh_if_expired()
+        return self.printers
+
+    def get_default_printer(self, timeout=None):
+        """
+        Get the default printer, waiting for the first enumeration if it is not done yet
+        :param timeout: Maximum time to wait in seconds | None to wait without limit
+        :return: The name of the default printer | None if there is none (or the timeout expired)
+        """
+        self.wait(timeout)
+        return self.default_printer
+
+    def wait(self, timeout=None):
+        """
+        Waits for the first enumeration
+        :param timeout: Maximum time to wait in seconds | None to wait without limit
+        :return: True if the printers were enumerated, False if the timeout expired
+        """
+        return self.loaded.wait(timeout)
+
+    def refresh(self, wait=False):
+        """
+        Enumerates the printers again in the background (no new enumeration is started if one is already running)
+        :param wait: True to wait for the end of the enumeration (the running one if there is one)
+        :return: None
+        """
+        with self.lock:
+            thread = self.refresh_thread
+            if thread is None:
+                thread = self.refresh_thread = Thread(target=self.enumerate, name="printer-registry", daemon=True)
+                thread.start()
+        if wait:
+            thread.join()
+
+    def refresh_if_expired(self):
+        """
+        Starts an enumeration in the background if the cache is older than the ttl
+        :return: None
+        """
+        if self.loaded_time is not None and time.monotonic() - self.loaded_time > self.ttl:
+            self.refresh()
+
+    def enumerate(self):
+        """
+        Enumerates the printers and updates the cache (background thread)
+        If the enumeration fails, the previous printers are kept and the error is kept in error until an enumeration
+        succeeds
+        :return: None
+        """
+        error = None
+        try:
+            printers = self.backend.enumerate_printers()
+            default_printer = self.backend.get_default_printer()
+        except Exception as e:
+            warnings.warn("The printers could not be enumerated: " + str(e))
+            error = e
+            printers, default_printer = self.printers, self.default_printer
+
+        with self.lock:
+            self.printers = printers
+            self.printer_names = frozenset(printers)
+            self.default_printer = default_printer
+            self.error = error
+            self.loaded_time = time.monotonic()
+            self.version += 1
+            self.refresh_thread = None
+        self.loaded.set()
@@ -0,0 +1,73 @@
+"""
+Sticker generation service: python -m service --port 8250 [--print]
+HTTP/JSON service for the programs that ask for stickers (see StickerService), only needs the standard library, PIL and
+reportlab (and the printers if printing is enabled)
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from service.sticker_service import StickerService
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m service", description="Serve the sticker generation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8250, help="port to listen on (default: 8250)")
+    parser.add_argument("-m", "--model", default=os.path.join("model", "data.json"),
+                        help="path to the stickers model (data.json)")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="number of pdfs generated at once (default: 2)")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="number of requests waiting for a worker before answering 503 (default: 32)")
+    parser.add_argument("--print", dest="print_pdf", action="store_true",
+                        help="allow the requests to print the stickers instead of getting the pdf")
+    parser.add_argument("--printer", help="printer to print to (default: the default printer)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the service until interrupted
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code
+    """
+    args = parse_args(argv)
+
+    print_queue = None
+    if args.print_pdf:
+        from print.print_queue import PrintQueue
+        from print.printer import Printer
+        print_queue = PrintQueue(Printer(args.printer))
+
+    try:
+        service = StickerService(args.model, workers=args.workers, max_pending=args.max_pending,
+                                 print_queue=print_queue)
+    except Exception as e:
+        if not e.args or e.args[0] != "Invalid model":
+            raise
+        for path, message in e.args[2]:
+            print("error: %s%s: %s" % (args.model, path, message), file=sys.stderr)
+        if print_queue is not None:
+            print_queue.close()
+        return 2
+    for path, message in service.model_loader.stickers.get_unusable_errors():
+        print("warning: %s%s: %s, sticker type not usable" % (args.model, path, message), file=sys.stderr)
+    print("Listening on http://%s:%d" % (args.host, args.port), file=sys.stderr)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if print_queue is not None:
+            print_queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
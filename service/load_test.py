@@ -0,0 +1,173 @@
+"""
+Load test of the sticker service: python -m service.load_test --requests 200 --concurrency 20 [--serve]
+Sends pdf requests from concurrent keep-alive connections and prints the latency, the throughput and the answers.
+With --serve, the service is started in this process (on a free port) and its peak memory is reported too
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m service.load_test", description="Load test the sticker service")
+    parser.add_argument("--host", default="127.0.0.1", help="address of the service (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8250, help="port of the service (default: 8250)")
+    parser.add_argument("--serve", action="store_true", help="start the service in this process on a free port")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="workers of the started service (default: 2)")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="max pending requests of the started service (default: 32)")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="number of requests (default: 200)")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="number of connections (default: 20)")
+    parser.add_argument("--count", type=int,
+                        help="number of stickers per request (default: a full page, chosen by the service)")
+    parser.add_argument("--same", action="store_true",
+                        help="send the same values in every request (served from the caches after the first one)")
+    return parser.parse_args(argv)
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    """
+    Sends a request on a keep-alive connection and reads the response
+    :param reader: Stream of the connection
+    :param writer: Stream of the connection
+    :param host: Host of the service
+    :param method: HTTP method
+    :param path: Path of the request
+    :param payload: Json content of the request | None for no body
+    :return: (status, body)
+    """
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(("%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                  % (method, path, host, len(body))).encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    return status, await reader.readexactly(content_length)
+
+
+def get_sample_values(sticker_type, i):
+    """
+    Get valid values for a sticker type, different for each request
+    :param sticker_type: Sticker type, as listed by GET /stickers
+    :param i: Number of the request
+    :return: The values by field name
+    """
+    values = {}
+    for field in sticker_type["fields"]:
+        if field["type"] == "number":
+            values[field["name"]] = 20 + i % 30
+        elif field["type"] == "date":
+            values[field["name"]] = "%02d.%02d.2024" % (1 + i % 28, 1 + i // 28 % 12)
+        elif field["type"] == "list":
+            values[field["name"]] = field["values"][i % len(field["values"])]
+        else:
+            values[field["name"]] = "Test %d" % i
+    return values
+
+
+async def run(args, host, port):
+    """
+    Runs the load test
+    :param args: Parsed arguments
+    :param host: Host of the service
+    :param port: Port of the service
+    :return: (latencies in seconds, count of the responses by status, bytes received, total time in seconds)
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    status, body = await request(reader, writer, host, "GET", "/stickers")
+    writer.close()
+    sticker_type = json.loads(body)[0]
+
+    next_request = iter(range(args.requests))
+    latencies = []
+    statuses = {}
+    received = [0]
+
+    async def connection():
+        conn_reader, conn_writer = await asyncio.open_connection(host, port)
+        try:
+            for i in next_request:
+                payload = {"type": sticker_type["name"],
+                           "values": get_sample_values(sticker_type, 0 if args.same else i), "stickers_left": 0}
+                if args.count is not None:
+                    payload["count"] = args.count
+                start_time = time.perf_counter()
+                response_status, response_body = await request(conn_reader, conn_writer, host, "POST", "/stickers/pdf",
+                                                               payload)
+                latencies.append(time.perf_counter() - start_time)
+                statuses[response_status] = statuses.get(response_status, 0) + 1
+                received[0] += len(response_body)
+        finally:
+            conn_writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(args.concurrency)))
+    return latencies, statuses, received[0], time.perf_counter() - start_time
+
+
+async def run_with_service(args):
+    """
+    Starts the service in this process and runs the load test against it
+    :param args: Parsed arguments
+    :return: The results of run
+    """
+    from service.sticker_service import StickerService
+
+    service = StickerService(workers=args.workers, max_pending=args.max_pending)
+    port = await service.start("127.0.0.1", 0)
+    try:
+        return await run(args, "127.0.0.1", port)
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    """
+    Run the load test and print the results
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code
+    """
+    args = parse_args(argv)
+    if args.serve:
+        latencies, statuses, received, total_time = asyncio.run(run_with_service(args))
+    else:
+        latencies, statuses, received, total_time = asyncio.run(run(args, args.host, args.port))
+
+    latencies.sort()
+    print("%d requests, %d connections, %s stickers each: %.2f s, %.1f requests/s, %.1f MB received"
+          % (len(latencies), args.concurrency, "a page of" if args.count is None else args.count, total_time,
+             len(latencies) / total_time, received / 1024 / 1024))
+    print("latency: median %.0f ms, p95 %.0f ms, max %.0f ms"
+          % (1000 * statistics.median(latencies), 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+             1000 * latencies[-1]))
+    print("responses: " + ", ".join("%d: %d" % (status, count) for status, count in sorted(statuses.items())))
+    if args.serve and resource is not None:
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print("peak memory: %.0f MB" % (max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
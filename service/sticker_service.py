@@ -0,0 +1,421 @@
+import asyncio
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from sticker.sheet_layout import SheetLayout
+from sticker.sticker_batch import StickerBatch
+from sticker.sticker_data import StickerDataList
+from sticker.sticker_model import get_data_type_name, get_loader
+
+# HTTP status of the errors, by first argument of the exception (500 for the others)
+ERROR_STATUSES = {
+    "Invalid request": 400,
+    "Invalid values": 400,
+    "Invalid count": 400,
+    "Line too long": 400,
+    "Not enough stickers left to print the page": 400,
+    "Printing disabled": 403,
+    "Not found": 404,
+    "Unknown sticker type": 404,
+    "Unusable sticker type": 409,
+    "Method not allowed": 405,
+    "Request too large": 413,
+    "Too many stickers": 413,
+    "Busy": 503,
+}
+
+MAX_HEADER_COUNT = 100
+MAX_BODY_SIZE = 1024 * 1024
+MAX_STICKERS = 2400
+CHUNK_SIZE = 64 * 1024
+
+
+class StickerService:
+    """
+    HTTP/JSON service generating stickers, so that other programs (weighing station, order entry) can ask for stickers
+    without the GUI. Only uses the standard library (asyncio)
+
+    GET  /stickers           sticker types and their fields
+    POST /stickers/validate  {"type", "values"}: checks the values, with the error of each invalid field
+    POST /stickers/pdf       {"type", "values", "count", "stickers_left", "backend", "print"} or {"records": [{"type",
+                             "values", "count"}, ...], ...}: the pdf of the stickers, or 202 once the pdf is queued to
+                             print if "print" is true
+
+    The pdfs are generated by a bounded pool of worker threads, at most max_pending requests wait for a worker (the
+    others get 503) and the pdfs are streamed from a temporary file, so the memory used does not grow with the number
+    of requests
+    """
+    def __init__(self, model_path=os.path.join("model", "data.json"), workers=2, max_pending=32, print_queue=None):
+        """
+        StickerService constructor
+        :param model_path: Path to the stickers model (data.json)
+        :param workers: Number of pdfs generated at the same time
+        :param max_pending: Number of requests that can wait for a worker
+        :param print_queue: PrintQueue printing the pdfs asked with "print" | None to disable printing
+        :return: None
+        """
+        self.model_loader = get_loader(model_path)
+        self.model_loader.load()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.print_queue = print_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sticker-service")
+        self.semaphore = None
+        self.pending = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8250):
+        """
+        Starts listening
+        :param host: Address to listen on
+        :param port: Port to listen on, 0 for a free port
+        :return: The port listened on
+        """
+        self.semaphore = asyncio.Semaphore(self.workers)
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host="127.0.0.1", port=8250):
+        """
+        Starts listening and serves the requests until cancelled
+        :param host: Address to listen on
+        :param port: Port to listen on
+        :return: None
+        """
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening and waits for the pdfs being generated
+        :return: None
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the requests of a connection (keep-alive) until the client closes it
+        :param reader: Stream of the connection
+        :param writer: Stream of the connection
+        :return: None
+        """
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except Exception as e:
+                    if isinstance(e, (ConnectionError, asyncio.IncompleteReadError)):
+                        raise
+                    await self.write_error(writer, e, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    await self.dispatch(writer, method, path, body, keep_alive)
+                except Exception as e:
+                    await self.write_error(writer, e, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_request(reader):
+        """
+        Reads a request
+        :param reader: Stream of the connection
+        :return: (method, path, headers with lowercase names, body) | None if the connection was closed
+        :raises Exception: If the request is invalid or too large
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise Exception("Invalid request", "request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADER_COUNT:
+                raise Exception("Request too large", "headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise Exception("Invalid request", "content-length")
+        if content_length > MAX_BODY_SIZE:
+            raise Exception("Request too large", content_length)
+        body = await reader.readexactly(content_length) if content_length > 0 else b""
+        return parts[0].upper(), parts[1].split("?")[0], headers, body
+
+    async def dispatch(self, writer, method, path, body, keep_alive):
+        """
+        Serves a request
+        :param writer: Stream of the connection
+        :param method: HTTP method
+        :param path: Path of the request
+        :param body: Body of the request
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        :raises Exception: If the request failed (see ERROR_STATUSES)
+        """
+        routes = {
+            "/stickers": ("GET", self.get_sticker_types),
+            "/stickers/validate": ("POST", self.validate),
+            "/stickers/pdf": ("POST", self.generate),
+        }
+        if path not in routes:
+            raise Exception("Not found", path)
+        route_method, handler = routes[path]
+        if method != route_method:
+            raise Exception("Method not allowed", method)
+
+        payload = None
+        if method == "POST":
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except ValueError:
+                raise Exception("Invalid request", "the body is not json")
+            if not isinstance(payload, dict):
+                raise Exception("Invalid request", "the body is not a json object")
+        await handler(writer, payload, keep_alive)
+
+    async def get_sticker_types(self, writer, _payload, keep_alive):
+        """
+        GET /stickers: the sticker types and their fields
+        :param writer: Stream of the connection
+        :param _payload: Unused parameter
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        """
+        sticker_types = []
+        for sticker in self.get_stickers().stickers_list:
+            fields = []
+            for data in sticker.data:
+                field = {"name": data.name, "type": get_data_type_name(data)}
+                if isinstance(data, StickerDataList):
+                    field["values"] = data.values
+                fields.append(field)
+            sticker_types.append({"name": sticker.name, "fields": fields})
+        await self.write_json(writer, 200, sticker_types, keep_alive)
+
+    async def validate(self, writer, payload, keep_alive):
+        """
+        POST /stickers/validate: checks values, the valid values are returned with the dates as dd/mm/yyyy, the errors by
+        field name
+        :param writer: Stream of the connection
+        :param payload: {"type", "values"}
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        :raises Exception: If the sticker type is unknown
+        """
+        sticker = self.get_sticker(payload.get("type"))
+        values = self.get_values(payload.get("values"))
+        record, errors = sticker.validator.check(values)
+        await self.write_json(writer, 200, {"valid": record is not None,
+                                            "values": values if record is None else dict(record),
+                                            "errors": {error.field: error.message for error in errors}}, keep_alive)
+
+    async def generate(self, writer, payload, keep_alive):
+        """
+        POST /stickers/pdf: generates the pdf of stickers and sends it, or queues it to print
+        :param writer: Stream of the connection
+        :param payload: {"type", "values", "count", "stickers_left", "backend", "print"} or {"records", ...}
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        :raises Exception: If the records are invalid or the service is busy
+        """
+        batch = self.get_batch(payload)
+        print_pdf = bool(payload.get("print", False))
+        if print_pdf and self.print_queue is None:
+            raise Exception("Printing disabled")
+        stickers_left = payload.get("stickers_left")
+        backend = payload.get("backend", "raster")
+        if (stickers_left is not None and not isinstance(stickers_left, int)) or backend not in ("raster", "vector"):
+            raise Exception("Invalid request", "stickers_left or backend")
+
+        fd, pdf_path = tempfile.mkstemp(prefix="service_", suffix=".pdf")
+        os.close(fd)
+        try:
+            await self.run_generation(batch, pdf_path, stickers_left, backend)
+            if print_pdf:
+                job = self.print_queue.submit(pdf_path, delete_file=True)
+                pdf_path = None
+                await self.write_json(writer, 202, {"state": job.state.value, "printer": job.printer_name,
+                                                    "stickers": batch.get_total_stickers()}, keep_alive)
+            else:
+                await self.write_file(writer, 200, "application/pdf", pdf_path, keep_alive)
+        finally:
+            if pdf_path is not None:
+                os.remove(pdf_path)
+
+    async def run_generation(self, batch, pdf_path, stickers_left, backend):
+        """
+        Generates the pdf of a batch in a worker thread, waiting for a free worker
+        :param batch: StickerBatch to generate
+        :param pdf_path: Path to which the pdf will be saved
+        :param stickers_left: Number of stickers left on the first page | None for a full page
+        :param backend: Rendering backend (raster or vector)
+        :return: None
+        :raises Exception: If too many requests are waiting for a worker, or the generation failed
+        """
+        if self.pending >= self.max_pending:
+            raise Exception("Busy", self.pending)
+        self.pending += 1
+        try:
+            async with self.semaphore:
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor, lambda: batch.generate(pdf_path, stickers_left=stickers_left, backend=backend))
+        finally:
+            self.pending -= 1
+
+    def get_stickers(self):
+        """
+        Get the sticker types, from the model as it is now (data.json is loaded again when it changes, an invalid change
+        is ignored until it is fixed)
+        :return: The Stickers object
+        """
+        try:
+            return self.model_loader.load()
+        except Exception as e:
+            print(e)
+            return self.model_loader.stickers
+
+    def get_sticker(self, name):
+        """
+        Get a sticker type by name
+        :param name: Name of the sticker type
+        :return: The StickerType
+        :raises Exception: If there is no sticker type with this name, or it could not be created from the model
+        """
+        stickers = self.get_stickers()
+        sticker = stickers.get_sticker(name) if isinstance(name, str) else None
+        if sticker is None:
+            if isinstance(name, str) and name in stickers.unusable_stickers:
+                raise Exception("Unusable sticker type", name, stickers.unusable_stickers[name][1])
+            raise Exception("Unknown sticker type", name)
+        return sticker
+
+    @staticmethod
+    def get_values(values):
+        """
+        Get the values of a payload, as text
+        :param values: Values by data name
+        :return: The values by data name, as text
+        :raises Exception: If the values are not a json object
+        """
+        if not isinstance(values, dict):
+            raise Exception("Invalid request", "values must be an object")
+        return {str(name): None if value is None else str(value) for name, value in values.items()}
+
+    def get_batch(self, payload):
+        """
+        Get the stickers asked by a payload
+        :param payload: {"type", "values", "count"} or {"records": [{"type", "values", "count"}, ...]}
+        :return: The StickerBatch of the stickers
+        :raises Exception: If a record is invalid or there are too many stickers
+        """
+        records = payload.get("records")
+        if records is None:
+            records = [{"type": payload.get("type"), "values": payload.get("values"),
+                        "count": payload.get("count", SheetLayout.load().slots_per_page)}]
+        if not isinstance(records, list) or not records:
+            raise Exception("Invalid request", "records must be a non empty list")
+
+        batch_records = []
+        total_stickers = 0
+        for record in records:
+            if not isinstance(record, dict):
+                raise Exception("Invalid request", "a record must be an object")
+            count = record.get("count", 1)
+            if not isinstance(count, int):
+                raise Exception("Invalid count", count)
+            total_stickers += count
+            if total_stickers > MAX_STICKERS:
+                raise Exception("Too many stickers", MAX_STICKERS)
+            batch_records.append((self.get_sticker(record.get("type")), self.get_values(record.get("values")), count))
+
+        batch = StickerBatch()
+        batch.add_all(batch_records)
+        return batch
+
+    async def write_error(self, writer, error, keep_alive):
+        """
+        Sends the response of a failed request
+        :param writer: Stream of the connection
+        :param error: Exception of the failure
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        """
+        message = error.args[0] if error.args and isinstance(error.args[0], str) else type(error).__name__
+        status = ERROR_STATUSES.get(message, 500)
+        if status == 500:
+            print(error)
+        await self.write_json(writer, status, {"error": message, "details": [str(arg) for arg in error.args[1:]]},
+                              keep_alive)
+
+    async def write_json(self, writer, status, content, keep_alive):
+        """
+        Sends a json response
+        :param writer: Stream of the connection
+        :param status: HTTP status
+        :param content: Json serializable content
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        """
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        writer.write(self.get_response_head(status, "application/json; charset=utf-8", len(body), keep_alive) + body)
+        await writer.drain()
+
+    async def write_file(self, writer, status, content_type, file_path, keep_alive):
+        """
+        Sends a file, by chunks (the file is never read in memory at once)
+        :param writer: Stream of the connection
+        :param status: HTTP status
+        :param content_type: Content type of the file
+        :param file_path: Path to the file
+        :param keep_alive: True if the connection stays open after the response
+        :return: None
+        """
+        with open(file_path, "rb") as f:
+            writer.write(self.get_response_head(status, content_type, os.fstat(f.fileno()).st_size, keep_alive))
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+    @staticmethod
+    def get_response_head(status, content_type, content_length, keep_alive):
+        """
+        Get the status line and headers of a response
+        :param status: HTTP status
+        :param content_type: Content type of the body
+        :param content_length: Size of the body
+        :param keep_alive: True if the connection stays open after the response
+        :return: The head of the response
+        """
+        head = "HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: %s\r\n" % (
+            status, HTTPStatus(status).phrase, content_type, content_length, "keep-alive" if keep_alive else "close")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        return (head + "\r\n").encode("latin-1")
@@ -0,0 +1,182 @@
+"""
+Headless sticker generation: python -m sticker --type "Sticker Aliment" --value "Nom aliment=Orge" ... -o stickers.pdf
+Only imports the sticker package, PIL and reportlab (no GUI, no win32print), so it runs on any platform
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Errors of the generation caused by the asked stickers (first argument of the exception), reported without traceback
+GENERATION_ERRORS = ("Line too long", "Not enough stickers left to print the page")
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m sticker", description="Generate a stickers pdf without the GUI")
+    parser.add_argument("-m", "--model", default="model/data.json", help="path to the stickers model (data.json)")
+    parser.add_argument("-t", "--type", help="name of the sticker type")
+    parser.add_argument("-v", "--value", action="append", default=[], metavar="NAME=VALUE",
+                        help="value of a sticker field, can be repeated")
+    parser.add_argument("--csv", help="CSV file with one record per row (columns: field names, optional type and "
+                                      "count)")
+    parser.add_argument("--json", help="JSON file with a list of records ({\"type\", \"values\", \"count\"} or field "
+                                       "values)")
+    parser.add_argument("-n", "--count", type=int, help="number of stickers per record (default: a full page for "
+                                                        "--value, 1 for --csv/--json rows without count)")
+    parser.add_argument("-l", "--stickers-left", type=int,
+                        help="number of stickers left on the first page (default: a full page, see "
+                             "config/sheet.json)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of rendering processes, 0 for the number of CPUs (default: 1)")
+    parser.add_argument("-b", "--backend", choices=("raster", "vector"), default="raster",
+                        help="rendering backend: stickers as images or as pdf text (default: raster)")
+    parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                        help="write the pdf without flattening the images and compressing the pages")
+    parser.add_argument("--size-report", action="store_true",
+                        help="also write the pdf without optimization and print both sizes on stderr")
+    parser.add_argument("--no-cache", dest="use_pdf_cache", action="store_false",
+                        help="generate the pdf even if the same stickers are in the pdf cache")
+    parser.add_argument("-o", "--output", help="path of the pdf to write")
+    parser.add_argument("--list", action="store_true", help="list the sticker types and their fields and exit")
+    parser.add_argument("--timings", action="store_true", help="print the duration of each step on stderr")
+    return parser.parse_args(argv)
+
+
+def read_records(args, full_page):
+    """
+    Read the records (sticker type name, values, count) asked on the command line
+    :param args: Parsed arguments
+    :param full_page: Number of stickers on a page, count of --value without --count
+    :return: List of (sticker type name, values, count)
+    """
+    if args.csv:
+        with open(args.csv, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+    elif args.json:
+        with open(args.json, encoding="utf-8-sig") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = [rows]
+    else:
+        values = {}
+        for value in args.value:
+            name, separator, value = value.partition("=")
+            if not separator:
+                raise Exception("Invalid value (expected NAME=VALUE)", value)
+            values[name] = value
+        return [(args.type, values, args.count or full_page)]
+
+    records = []
+    for row in rows:
+        row = dict(row)
+        values = row.pop("values", None)
+        sticker_type = row.pop("type", None) or args.type
+        count = int(row.pop("count", None) or args.count or 1)
+        records.append((sticker_type, row if values is None else values, count))
+    return records
+
+
+def main(argv=None):
+    """
+    Generate the stickers pdf asked on the command line
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code
+    """
+    start_time = time.perf_counter()
+    args = parse_args(argv)
+
+    # imported once the arguments are parsed so that --help and argument errors stay instant
+    from sticker.sheet_layout import SheetLayout
+    from sticker.sticker_batch import StickerBatch
+    from sticker.sticker_generation import StickerGenerator
+    from sticker.sticker_model import load_stickers
+    import_time = time.perf_counter()
+
+    try:
+        stickers = load_stickers(args.model)
+    except Exception as e:
+        if not e.args or e.args[0] != "Invalid model":
+            raise
+        for path, message in e.args[2]:
+            print("error: %s%s: %s" % (args.model, path, message), file=sys.stderr)
+        return 2
+    load_time = time.perf_counter()
+    for path, message in stickers.get_unusable_errors():
+        print("warning: %s%s: %s, sticker type not usable" % (args.model, path, message), file=sys.stderr)
+
+    if args.list:
+        for sticker in stickers.stickers_list:
+            print(sticker.name)
+            for data in sticker.data:
+                print("    " + data.name + (" (" + ", ".join(data.values) + ")" if hasattr(data, "values") else ""))
+        return 0
+
+    if args.output is None:
+        print("error: the output pdf (-o) is required", file=sys.stderr)
+        return 2
+
+    batch = StickerBatch()
+    try:
+        records = []
+        for name, values, count in read_records(args, SheetLayout.load().slots_per_page):
+            if name in stickers.unusable_stickers:
+                raise Exception("Unusable sticker type", name, stickers.unusable_stickers[name][1])
+            if name not in stickers:
+                raise Exception("Unknown sticker type", name)
+            records.append((stickers.get_sticker(name), values, count))
+        batch.add_all(records)
+    except Exception as e:
+        if e.args and e.args[0] == "Invalid values":
+            # every invalid value of every record, one per line
+            for error in e.args[1:]:
+                print("error: " + str(error), file=sys.stderr)
+        else:
+            print("error: " + " ".join(str(arg) for arg in e.args), file=sys.stderr)
+        return 2
+
+    try:
+        durations = batch.generate(args.output, stickers_left=args.stickers_left, workers=args.workers or None,
+                                   backend=args.backend, optimize=args.optimize, use_pdf_cache=args.use_pdf_cache)
+    except OSError as e:
+        print("error: %s" % e, file=sys.stderr)
+        return 2
+    except Exception as e:
+        if not e.args or e.args[0] not in GENERATION_ERRORS:
+            raise
+        print("error: " + " ".join(str(arg) for arg in e.args), file=sys.stderr)
+        return 2
+
+    if args.size_report:
+        size = os.path.getsize(args.output)
+        with tempfile.TemporaryDirectory() as directory:
+            unoptimized_path = os.path.join(directory, "unoptimized.pdf")
+            batch.generate(unoptimized_path, stickers_left=args.stickers_left, workers=args.workers or None,
+                           backend=args.backend, optimize=False, use_pdf_cache=False)
+            unoptimized_size = os.path.getsize(unoptimized_path)
+        print("pdf size: %d bytes without optimization, %d bytes written (%.1f %%)"
+              % (unoptimized_size, size, 100 * size / unoptimized_size), file=sys.stderr)
+
+    if args.timings:
+        print("imports: %.3f s" % (import_time - start_time), file=sys.stderr)
+        print("model loading: %.3f s" % (load_time - import_time), file=sys.stderr)
+        if not durations:
+            print("pdf copied from the pdf cache", file=sys.stderr)
+        for state, duration in durations.items():
+            print("%s: %.3f s" % (state.name.lower(), duration), file=sys.stderr)
+        render_cache = StickerGenerator.rendered_stickers.stats()
+        print("render cache: %d hits, %d misses, %.1f MB" % (render_cache['hits'], render_cache['misses'],
+                                                             render_cache['weight'] / 1024 / 1024), file=sys.stderr)
+        print("total (without interpreter start): %.3f s" % (time.perf_counter() - start_time), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from threading import Lock
+
+umask_lock = Lock()
+
+
+def read_umask():
+    """
+    Read the umask of the process, it can only be read by setting it: it is read once, when the module is imported
+    (another thread creating a file while the umask is 0 would create it with too wide permissions)
+    :return: The umask
+    """
+    with umask_lock:
+        umask = os.umask(0)
+        os.umask(umask)
+    return umask
+
+
+# Umask of the process, the permissions of the new files
+UMASK = read_umask()
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Opens a temporary file next to path to write a file atomically: when the block ends, the temporary file is flushed
+    to disk and renamed to path, so that readers of path (pdf viewer, printer) see either the old file or the complete
+    new one, never a half written file
+    If the block raises, the temporary file is deleted and path is left untouched
+    :param path: Path of the file to write
+    :return: Context manager giving the temporary file, opened in binary write mode
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstemp creates the file readable by its owner only, give it the permissions path has or would have
+            os.chmod(tmp_path, get_file_mode(path))
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def get_file_mode(path):
+    """
+    Get the permissions of a file, or the ones a new file would get if it does not exist
+    :param path: Path of the file
+    :return: The permission bits
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~UMASK
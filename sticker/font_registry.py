@@ -0,0 +1,212 @@
+import json
+import os
+import warnings
+from collections.abc import Mapping
+from threading import RLock
+
+from PIL import ImageFont
+
+# Used when config/fonts.json is missing or does not define a font, the first file that can be loaded is used. A file
+# is a file name (loaded at the size of the font) or {"file": ..., "size": ...} for a fallback that needs its own size.
+# The stickers are laid out for Segoe UI, the fallbacks are ordered from the narrowest (Arial metrics, DejaVu
+# condensed) to DejaVu Sans, a tenth wider: it is made smaller so that the static texts of the model still fit
+DEFAULT_FONTS = {
+    'normal': {'files': ["segoeui.ttf", "arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSansCondensed.ttf",
+                         {'file': "DejaVuSans.ttf", 'size': 18}], 'size': 20},
+    'bold': {'files': ["segoeuib.ttf", "arialbd.ttf", "LiberationSans-Bold.ttf", "DejaVuSansCondensed-Bold.ttf",
+                       {'file': "DejaVuSans-Bold.ttf", 'size': 18}], 'size': 20},
+    'big': {'files': ["segoeui.ttf", "arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSansCondensed.ttf",
+                      {'file': "DejaVuSans.ttf", 'size': 23}], 'size': 26},
+    'big_bold': {'files': ["segoeuib.ttf", "arialbd.ttf", "LiberationSans-Bold.ttf", "DejaVuSansCondensed-Bold.ttf",
+                           {'file': "DejaVuSans-Bold.ttf", 'size': 23}], 'size': 26},
+}
+
+
+def get_font_files(font_config):
+    """
+    Get the files of a font with the size to load each of them at
+    :param font_config: Configuration of the font ({"files": [...], "size": ...})
+    :return: List of (file, size), in the order of the configuration
+    """
+    files = []
+    for file in font_config['files']:
+        if isinstance(file, dict):
+            files.append((file['file'], file.get('size', font_config['size'])))
+        else:
+            files.append((file, font_config['size']))
+    return files
+
+
+class FontRegistry(Mapping):
+    """
+    Lazy registry of the sticker fonts, by font key
+    A font is loaded the first time it is used, its real size comes from a persistent metrics cache when possible
+    Each font is a dict with 'font' (PIL font), 'real_size' (line height) and 'path' (file of the font, as found in the
+    font directories of the system, None for the PIL default font)
+    """
+    def __init__(self, config_path=os.path.join("config", "fonts.json"),
+                 metrics_cache_path=os.path.join("config", "font_metrics.json")):
+        """
+        FontRegistry constructor, nothing is read or loaded before the first use of a font
+        :param config_path: Path to the fonts configuration (font key: {"files": [...], "size": ...}, see
+                            DEFAULT_FONTS)
+        :param metrics_cache_path: Path to the persistent cache of the font real sizes | None to disable it
+        :return: None
+        """
+        self.config_path = config_path
+        self.metrics_cache_path = metrics_cache_path
+        self.config = None
+        self.metrics_cache = None
+        self.fonts = {}
+        self.lock = RLock()
+
+    def __getitem__(self, font_key):
+        """
+        Get a font, loading it on first use
+        :param font_key: Key of the font
+        :return: The font dict ('font', 'real_size', 'path')
+        :raises KeyError: If the font key is not configured
+        """
+        font = self.fonts.get(font_key)
+        if font is None:
+            with self.lock:
+                font = self.fonts.get(font_key)
+                if font is None:
+                    font = self.fonts[font_key] = self.load_font(font_key)
+        return font
+
+    def __iter__(self):
+        """
+        Iterate over the configured font keys (without loading the fonts)
+        :return: An iterator over the font keys
+        """
+        return iter(self.get_config())
+
+    def __len__(self):
+        """
+        Number of configured fonts
+        :return: The number of configured fonts
+        """
+        return len(self.get_config())
+
+    def get_config(self):
+        """
+        Get the fonts configuration, read on first use and completed with DEFAULT_FONTS
+        :return: The fonts configuration by font key
+        """
+        with self.lock:
+            if self.config is None:
+                config = dict(DEFAULT_FONTS)
+                if os.path.isfile(self.config_path):
+                    with open(self.config_path, encoding="utf-8-sig") as f:
+                        config.update(json.load(f))
+                self.config = config
+            return self.config
+
+    def load_font(self, font_key):
+        """
+        Load a font from the first of its configured files that can be loaded, the PIL default font if none can
+        :param font_key: Key of the font
+        :return: The font dict ('font', 'real_size', 'path')
+        :raises KeyError: If the font key is not configured
+        """
+        font_config = self.get_config()[font_key]
+        files = get_font_files(font_config)
+        font = None
+        path = None
+        size = font_config['size']
+        for file, file_size in files:
+            try:
+                font = ImageFont.truetype(file, file_size)
+            except OSError:
+                continue
+            # PIL looks for the file in the font directories of the system, its path is the one it found
+            path, size = font.path, file_size
+            if file != files[0][0]:
+                warnings.warn("%s not found for %s, using %s at size %d" % (files[0][0], font_key, file, size))
+            break
+        if font is None:
+            warnings.warn("No font file found for " + font_key + ", using the default font")
+            font = ImageFont.load_default(size)
+
+        return {
+            'font': font,
+            'real_size': self.get_real_size(font, path, size),
+            'path': path,
+        }
+
+    def get_files_stamp(self):
+        """
+        Get the stamp of the font files used, e.g. to know if a pdf generated earlier used the same fonts (the fonts are
+        loaded)
+        :return: [path, modification time, size] of the file of each font by font key, None for the PIL default font or
+                 a file that can not be read anymore
+        """
+        stamps = {}
+        for font_key in self:
+            path = self[font_key]['path']
+            try:
+                stat = os.stat(path)
+                stamps[font_key] = [path, stat.st_mtime_ns, stat.st_size]
+            except (OSError, TypeError):
+                stamps[font_key] = None
+        return stamps
+
+    def get_real_size(self, font, path, size):
+        """
+        Get the real size (line height) of a font, from the metrics cache or measured and added to the cache
+        :param font: PIL font
+        :param path: File of the font (None for the default font)
+        :param size: Size of the font
+        :return: The real size of the font
+        """
+        family, style = font.getname()
+        cache_key = "|".join([str(path), str(size), str(family), str(style)])
+
+        metrics_cache = self.get_metrics_cache()
+        if cache_key in metrics_cache:
+            return metrics_cache[cache_key]
+
+        descent = font.getmetrics()[1]
+        real_size = font.getmask("AjQlafTB").getbbox()[3] - descent + 5
+
+        metrics_cache[cache_key] = real_size
+        self.save_metrics_cache()
+        return real_size
+
+    def get_metrics_cache(self):
+        """
+        Get the persistent cache of the font real sizes, read on first use
+        :return: The cache (cache key: real size)
+        """
+        if self.metrics_cache is None:
+            self.metrics_cache = {}
+            if self.metrics_cache_path is not None and os.path.isfile(self.metrics_cache_path):
+                try:
+                    with open(self.metrics_cache_path, encoding="utf-8") as f:
+                        self.metrics_cache = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self.metrics_cache
+
+    def save_metrics_cache(self):
+        """
+        Write the metrics cache to disk, an unwritable cache only costs measuring the fonts again next time
+        :return: None
+        """
+        if self.metrics_cache_path is None:
+            return
+        try:
+            with open(self.metrics_cache_path, "w", encoding="utf-8") as f:
+                json.dump(self.metrics_cache, f, indent=2)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Forget the loaded fonts and the configuration, they are read again on next use
+        :return: None
+        """
+        with self.lock:
+            self.fonts = {}
+            self.config = None
@@ -0,0 +1,246 @@
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from threading import Lock
+
+from sticker.generation_state import StickerGenerationStates
+
+
+class GenerationJobStates(Enum):
+    """
+    Enum for the states of a generation job
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class GenerationJob:
+    """
+    Class to represent stickers to generate in a pdf file by a GenerationScheduler
+    The job has its own value record, the fields of the form can be changed as soon as it is queued
+    """
+    ids = itertools.count(1)
+
+    def __init__(self, sticker, values, save_file_path, stickers_left=None, total_stickers=None, on_done=None,
+                 delete_file=False, use_pdf_cache=True):
+        """
+        GenerationJob constructor
+        :param sticker: Sticker type to generate
+        :param values: StickerValues of the sticker (see StickerType.validate)
+        :param save_file_path: Path to which the pdf will be saved
+        :param stickers_left: Number of stickers left on the first page | None for a full page
+        :param total_stickers: Number of stickers to print | None for a full page
+        :param on_done: Function called with the job once the pdf is generated (from a worker thread), e.g. to print it
+        :param delete_file: True to delete the pdf if the job fails or is cancelled (e.g. a temporary file)
+        :param use_pdf_cache: True to copy the pdf from the pdf cache when the same stickers were generated before
+        :return: None
+        """
+        self.id = next(GenerationJob.ids)
+        self.sticker = sticker
+        self.values = values
+        self.save_file_path = save_file_path
+        self.stickers_left = stickers_left
+        self.total_stickers = total_stickers
+        self.on_done = on_done
+        self.delete_file = delete_file
+        self.use_pdf_cache = use_pdf_cache
+        self.state = GenerationJobStates.QUEUED
+        self.progress = StickerGenerationStates.STARTING
+        self.error = None
+        self.stage_durations = {}
+        self.cancel_requested = False
+        self.future = None
+        self.queued_time = time.perf_counter()
+        self.done_time = None
+
+    def is_active(self):
+        """
+        Check if the job is queued or running
+        :return: True if the job is not done, failed or cancelled
+        """
+        return self.state in (GenerationJobStates.QUEUED, GenerationJobStates.RUNNING)
+
+
+class GenerationScheduler:
+    """
+    Queue of generation jobs run by a bounded pool of worker threads, so that stickers can be queued one after the other
+    while the previous ones are still being generated or printed
+    """
+    def __init__(self, workers=2, state_callback=None, max_done_jobs=20):
+        """
+        GenerationScheduler constructor
+        :param workers: Maximum number of jobs generated at the same time
+        :param state_callback: Callback function called with the job when a job changes state or progresses (from a
+                               worker thread, or from the calling thread for cancellations)
+        :param max_done_jobs: Number of done, failed or cancelled jobs kept in the job list
+        :return: None
+        """
+        self.state_callback = state_callback
+        self.max_done_jobs = max_done_jobs
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sticker-generation")
+        self.jobs = []
+        self.jobs_lock = Lock()
+        self.version = 0
+
+    def submit(self, sticker, values, save_file_path, stickers_left=None, total_stickers=None, on_done=None,
+               delete_file=False, use_pdf_cache=True):
+        """
+        Queues stickers to generate
+        :param sticker: Sticker type to generate
+        :param values: StickerValues of the sticker (see StickerType.validate)
+        :param save_file_path: Path to which the pdf will be saved
+        :param stickers_left: Number of stickers left on the first page | None for a full page
+        :param total_stickers: Number of stickers to print | None for a full page
+        :param on_done: Function called with the job once the pdf is generated (from a worker thread)
+        :param delete_file: True to delete the pdf if the job fails or is cancelled
+        :param use_pdf_cache: True to copy the pdf from the pdf cache when the same stickers were generated before
+        :return: The GenerationJob of the stickers
+        """
+        job = GenerationJob(sticker, values, save_file_path, stickers_left, total_stickers, on_done, delete_file,
+                            use_pdf_cache)
+        with self.jobs_lock:
+            self.jobs.append(job)
+            self.version += 1
+            job.future = self.executor.submit(self.run_job, job)
+        self.notify(job)
+        return job
+
+    def cancel(self, job):
+        """
+        Cancels a job: a queued job is removed from the queue, a running job is stopped at its next generation stage
+        (if it is past its last stage, its pdf is kept but not handed to on_done)
+        :param job: Job to cancel
+        :return: True if the job was queued or running, False if it was already over
+        """
+        with self.jobs_lock:
+            if not job.is_active():
+                return False
+            job.cancel_requested = True
+            cancelled = job.future.cancel()
+        if cancelled:
+            self.finish_job(job, GenerationJobStates.CANCELLED)
+        return True
+
+    def get_jobs(self, states=None):
+        """
+        Get the jobs of the scheduler
+        :param states: States of the jobs to get | None for all the jobs
+        :return: List of the jobs, in queuing order
+        """
+        with self.jobs_lock:
+            return [job for job in self.jobs if states is None or job.state in states]
+
+    def wait(self, timeout=None):
+        """
+        Waits until all the queued jobs are done, failed or cancelled
+        :param timeout: Maximum time to wait in seconds | None to wait without limit
+        :return: True if all the jobs are over, False if the timeout expired
+        """
+        end_time = None if timeout is None else time.perf_counter() + timeout
+        while self.get_jobs((GenerationJobStates.QUEUED, GenerationJobStates.RUNNING)):
+            if end_time is not None and time.perf_counter() > end_time:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, cancel=False):
+        """
+        Stops the worker threads once the queued jobs are generated
+        :param cancel: True to cancel the queued and running jobs instead
+        :return: None
+        """
+        if cancel:
+            for job in self.get_jobs((GenerationJobStates.QUEUED, GenerationJobStates.RUNNING)):
+                self.cancel(job)
+        self.executor.shutdown(wait=True)
+
+    def run_job(self, job):
+        """
+        Generates the pdf of a job (worker thread)
+        :param job: Job to generate
+        :return: None
+        """
+        if job.cancel_requested:
+            self.finish_job(job, GenerationJobStates.CANCELLED)
+            return
+        self.set_job_state(job, GenerationJobStates.RUNNING)
+
+        def state_callback(state):
+            if job.cancel_requested and state != StickerGenerationStates.DONE:
+                raise Exception("Job cancelled", job.id)
+            job.progress = state
+            self.notify(job)
+
+        try:
+            job.stage_durations = job.sticker.generate(job.values, job.save_file_path, state_callback,
+                                                       use_pdf_cache=job.use_pdf_cache,
+                                                       stickers_left=job.stickers_left,
+                                                       total_stickers=job.total_stickers)
+        except Exception as e:
+            if job.cancel_requested:
+                self.finish_job(job, GenerationJobStates.CANCELLED)
+            else:
+                print(e)
+                job.error = e
+                self.finish_job(job, GenerationJobStates.FAILED)
+            return
+
+        if job.cancel_requested:
+            self.finish_job(job, GenerationJobStates.CANCELLED)
+            return
+        try:
+            if job.on_done is not None:
+                job.on_done(job)
+        except Exception as e:
+            print(e)
+            job.error = e
+            self.finish_job(job, GenerationJobStates.FAILED)
+            return
+        self.finish_job(job, GenerationJobStates.DONE)
+
+    def finish_job(self, job, state):
+        """
+        Ends a job: deletes its pdf if it failed or was cancelled and is to be deleted, sets its final state and forgets
+        the oldest jobs that are over
+        :param job: Job that is over
+        :param state: Final state of the job (done, failed or cancelled)
+        :return: None
+        """
+        if state != GenerationJobStates.DONE and job.delete_file:
+            try:
+                os.remove(job.save_file_path)
+            except OSError:
+                pass
+        job.done_time = time.perf_counter()
+        self.set_job_state(job, state)
+
+        with self.jobs_lock:
+            done_jobs = [job for job in self.jobs if job.done_time is not None]
+            forgotten_jobs = set(map(id, done_jobs[:max(0, len(done_jobs) - self.max_done_jobs)]))
+            self.jobs = [job for job in self.jobs if id(job) not in forgotten_jobs]
+
+    def set_job_state(self, job, state):
+        """
+        Changes the state of a job and calls the state callback
+        :param job: Job of which the state changes
+        :param state: New state of the job
+        :return: None
+        """
+        job.state = state
+        self.notify(job)
+
+    def notify(self, job):
+        """
+        Records that a job changed and calls the state callback
+        :param job: Job that changed
+        :return: None
+        """
+        with self.jobs_lock:
+            self.version += 1
+        if self.state_callback is not None:
+            self.state_callback(job)
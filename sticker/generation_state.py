@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class StickerGenerationStates(float, Enum):
+    """
+    Enum to represent the different states of the sticker generation (the value is the progress of the generation)
+    """
+    STARTING = 0.1,
+    GENERATING_IMG = 0.2,
+    GENERATING_PDF = 0.6,
+    DONE = 1
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache with hit, miss and eviction counters
+    The cache can also be limited by the total weight of its values (e.g. their size in memory)
+    """
+    def __init__(self, maxsize=1024, max_weight=None, weigher=None):
+        """
+        LRUCache constructor
+        :param maxsize: Maximum number of entries kept in the cache
+        :param max_weight: Maximum total weight of the values kept in the cache | None for no limit
+        :param weigher: Function giving the weight of a value | default: 1 per value
+        :return: None
+        """
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        """
+        Check if an entry is in the cache, without counting a hit or a miss or marking it as used
+        :param key: Key of the entry
+        :return: True if the entry is in the cache
+        """
+        return key in self.entries
+
+    def __len__(self):
+        """
+        Number of entries in the cache
+        :return: The number of entries in the cache
+        """
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """
+        Gets an entry from the cache and marks it as the most recently used
+        :param key: Key of the entry
+        :param default: Value returned if the entry is not in the cache
+        :return: The cached value, default if the entry is not in the cache
+        """
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value[0]
+
+    def put(self, key, value):
+        """
+        Adds an entry to the cache, evicting the least recently used entries if the cache is full
+        :param key: Key of the entry
+        :param value: Value of the entry
+        :return: None
+        """
+        weight = 1 if self.weigher is None else self.weigher(value)
+        with self.lock:
+            if key in self.entries:
+                self.weight -= self.entries[key][1]
+            self.entries[key] = (value, weight)
+            self.entries.move_to_end(key)
+            self.weight += weight
+            self.evict()
+
+    def resize(self, maxsize, max_weight=None):
+        """
+        Changes the limits of the cache, evicting the least recently used entries if the cache is too big
+        :param maxsize: Maximum number of entries kept in the cache
+        :param max_weight: Maximum total weight of the values kept in the cache | None for no limit
+        :return: None
+        """
+        with self.lock:
+            self.maxsize = maxsize
+            self.max_weight = max_weight
+            self.evict()
+
+    def evict(self):
+        """
+        Evicts the least recently used entries until the cache fits its limits, the lock must be held
+        :return: None
+        """
+        while self.entries and (len(self.entries) > self.maxsize or
+                                (self.max_weight is not None and self.weight > self.max_weight)):
+            key, (value, weight) = self.entries.popitem(last=False)
+            self.weight -= weight
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all the entries from the cache (the counters are kept)
+        :return: None
+        """
+        with self.lock:
+            self.entries.clear()
+            self.weight = 0
+
+    def stats(self):
+        """
+        Gets the cache statistics
+        :return: A dict with the hits, misses, evictions, current and maximum size and weight of the cache
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'weight': self.weight,
+                'max_weight': self.max_weight,
+            }
@@ -0,0 +1,106 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sticker.sticker_generation import StickerGenerator
+
+# Sticker types of the current worker process, by sticker key (see get_sticker_key)
+worker_stickers = {}
+
+
+def get_sticker_key(sticker):
+    """
+    Gets the key of a sticker type in the worker processes: its name and its definition, a sticker type loaded again
+    with the same name but another definition (e.g. after model/data.json was reloaded) has another key
+    The compiled layout can not be compared by identity as in the cache of rendered stickers, the worker processes
+    compile their own
+    :param sticker: Sticker type
+    :return: The key of the sticker type
+    """
+    return sticker.name, json.dumps(sticker.get_definition(), sort_keys=True)
+
+
+def init_worker(stickers):
+    """
+    Initializes a rendering process: the sticker types are received (and their layout compiled) once, the fonts and the
+    logo template are loaded once
+    :param stickers: Sticker types the process can render
+    :return: None
+    """
+    worker_stickers.clear()
+    for sticker in stickers:
+        worker_stickers[get_sticker_key(sticker)] = sticker
+        StickerGenerator.get_base_image(sticker)
+
+
+def render_sticker(task):
+    """
+    Renders a sticker in a worker process
+    :param task: (key of the sticker type (see get_sticker_key), values of the sticker)
+    :return: The rendered sticker image (PIL image)
+    """
+    key, values = task
+    return StickerGenerator.create_sticker(worker_stickers[key], values)
+
+
+class ParallelStickerRenderer:
+    """
+    Renders stickers in a pool of processes, results are given back in the order of the records
+    """
+    def __init__(self, stickers, workers=None, chunksize=4):
+        """
+        ParallelStickerRenderer constructor
+        :param stickers: Sticker types that can be rendered
+        :param workers: Number of worker processes | None for the number of CPUs
+        :param chunksize: Number of records sent to a worker at once
+        :return: None
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        stickers = list(stickers)
+        self.sticker_keys = {get_sticker_key(sticker) for sticker in stickers}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=init_worker,
+                                            initargs=(stickers,))
+
+    def __enter__(self):
+        """
+        Use the renderer as a context manager, the processes are stopped on exit
+        :return: The renderer
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Stop the worker processes
+        :return: None
+        """
+        self.close()
+
+    def render(self, records):
+        """
+        Renders the stickers of records in the worker processes
+        :param records: Iterable of records with sticker and values (e.g. a StickerBatch)
+        :return: Iterator over the rendered images (PIL images), in the order of the records, each image is available
+                 as soon as it and the ones before it are rendered
+        :raises Exception: If a record has a sticker type the renderer was not created with (or another definition of
+                           it)
+        """
+        tasks = []
+        keys = {}
+        for record in records:
+            # the records of a batch share a few sticker types, the key is computed once for each
+            key = keys.get(id(record.sticker))
+            if key is None:
+                key = keys[id(record.sticker)] = get_sticker_key(record.sticker)
+                if key not in self.sticker_keys:
+                    raise Exception("Unknown sticker type", record.sticker.name)
+            tasks.append((key, record.values))
+        return self.executor.map(render_sticker, tasks, chunksize=self.chunksize)
+
+    def close(self):
+        """
+        Stop the worker processes
+        :return: None
+        """
+        self.executor.shutdown()
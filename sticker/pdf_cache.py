@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import warnings
+from threading import Lock
+
+from sticker.atomic_file import atomic_write
+
+
+class PdfCache:
+    """
+    On-disk cache of generated pdfs, addressed by a hash of everything the pdf depends on
+    The least recently used pdfs are deleted when the cache gets bigger than its maximum size, the modification time of
+    a cached pdf is its last use
+    """
+    def __init__(self, directory=os.path.join("cache", "pdf"), max_size=100 * 1024 * 1024):
+        """
+        PdfCache constructor, the directory is created when the first pdf is stored
+        :param directory: Directory of the cached pdfs
+        :param max_size: Maximum total size of the cached pdfs, in bytes
+        :return: None
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(*parts):
+        """
+        Get the cache key of a pdf
+        :param parts: Everything the pdf depends on, as json serializable values
+        :return: The cache key (sha256 hex digest)
+        """
+        data = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        """
+        Get the path of a cached pdf
+        :param key: Cache key of the pdf
+        :return: The path of the cached pdf
+        """
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key, save_file_path):
+        """
+        Copies a cached pdf to save_file_path (atomically, see atomic_write) and marks it as the most recently used
+        :param key: Cache key of the pdf
+        :param save_file_path: Path to which the pdf will be saved
+        :return: The size of the pdf if it was cached, None otherwise
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as cached_file, atomic_write(save_file_path) as pdf_file:
+                shutil.copyfileobj(cached_file, pdf_file)
+                size = pdf_file.tell()
+            os.utime(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return size
+
+    def put(self, key, pdf_path):
+        """
+        Stores a copy of a pdf in the cache, then evicts the least recently used pdfs if the cache is too big
+        A cache that cannot be written only costs generating the pdf again next time
+        :param key: Cache key of the pdf
+        :param pdf_path: Path of the pdf to store
+        :return: None
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(pdf_path, "rb") as pdf_file, atomic_write(self.get_path(key)) as cached_file:
+                shutil.copyfileobj(pdf_file, cached_file)
+            self.evict()
+        except OSError as e:
+            warnings.warn("The pdf could not be stored in the pdf cache: " + str(e))
+
+    def evict(self):
+        """
+        Deletes the least recently used pdfs until the cache is not bigger than its maximum size
+        :return: None
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total_size = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            with self.lock:
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Deletes all the cached pdfs (the counters are kept)
+        :return: None
+        """
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".pdf"):
+                    os.remove(entry.path)
+
+    def stats(self):
+        """
+        Gets the cache statistics
+        :return: A dict with the hits, misses, evictions and maximum size (bytes) of the cache
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'max_size': self.max_size,
+            }
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from threading import Lock
+
+from PIL import Image as PILImage
+from reportlab import rl_config
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+
+# Colour the stickers are printed on, transparent parts of the images are flattened on it
+PAPER_COLOR = (255, 255, 255)
+
+# Canvases embedding an image or writing their pages without ASCII85 (see without_a85), and the setting they restore
+a85_lock = Lock()
+a85_users = 0
+a85_setting = None
+
+
+@contextmanager
+def without_a85():
+    """
+    Turns off the ASCII85 encoding of the pdf streams, a quarter bigger than the flate compressed data they encode
+    The encoding is a reportlab setting of the process (rl_config.useA85), read when an image is embedded and when the
+    pages are written: it is turned off while a canvas does it, and set back once no canvas does
+    :return: Context manager
+    """
+    global a85_users, a85_setting
+    with a85_lock:
+        if a85_users == 0:
+            a85_setting = rl_config.useA85
+            rl_config.useA85 = 0
+        a85_users += 1
+    try:
+        yield
+    finally:
+        with a85_lock:
+            a85_users -= 1
+            if a85_users == 0:
+                rl_config.useA85 = a85_setting
+
+
+def flatten_image(image):
+    """
+    Flattens an image with transparency on the paper colour, the pdf then needs no alpha soft mask for it
+    Drawing the flattened image on the page gives the same result as drawing the transparent one, nothing is drawn below
+    the images
+    :param image: PIL image or path to an image
+    :return: The image without transparency (the image itself if it has none)
+    """
+    if isinstance(image, str):
+        image = PILImage.open(image)
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode not in ("RGBA", "LA", "PA"):
+        return image
+
+    flat = PILImage.new("RGB", image.size, PAPER_COLOR)
+    flat.paste(image.convert("RGBA"), mask=image.getchannel("A"))
+    return flat
+
+
+class StickerCanvas(Canvas):
+    """
+    Canvas of a stickers pdf, the images shared by several stickers (the sticker images, the logo) are embedded once and
+    only referenced from every slot and page, the page streams are always compressed (without ASCII85 encoding)
+    The output is deterministic (no creation date or random document id): the same stickers give the same bytes
+    When optimized, the images are flattened on the paper colour (no alpha soft masks)
+    """
+    def __init__(self, file, pagesize, optimize=True):
+        """
+        StickerCanvas constructor
+        :param file: Path or file object to write the pdf to
+        :param pagesize: (width, height) of the pages
+        :param optimize: True to flatten the images | default: True
+        :return: None
+        """
+        super().__init__(file, pagesize=pagesize, pageCompression=1, invariant=1)
+        self.optimize = optimize
+        self.shared_images = {}
+
+    def draw_shared_image(self, image, x, y, width, height):
+        """
+        Draws an image, the image is converted and embedded only the first time it is drawn (by identity)
+        :param image: PIL image or path to an image, it must not be modified while the pdf is written
+        :param x: X coordinate of the bottom left corner of the image
+        :param y: Y coordinate of the bottom left corner of the image
+        :param width: Width of the image on the page
+        :param height: Height of the image on the page
+        :return: None
+        """
+        entry = self.shared_images.get(id(image))
+        if entry is None:
+            reader = ImageReader(flatten_image(image) if self.optimize else image)
+            drawn = {'name': None}
+            with without_a85():
+                self.drawImage(reader, x, y, width, height, mask="auto", extraReturn=drawn)
+            # the image is kept in the entry so that its id is not reused while the pdf is written
+            self.shared_images[id(image)] = (image, drawn['name'])
+            return
+
+        self.saveState()
+        self.translate(x, y)
+        self.scale(width, height)
+        self.doForm(entry[1])
+        self.restoreState()
+
+    def save(self):
+        """
+        Writes the pdf, the page streams without ASCII85 encoding
+        :return: None
+        """
+        with without_a85():
+            super().save()
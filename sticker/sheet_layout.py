@@ -0,0 +1,114 @@
+import json
+import os
+from threading import Lock
+
+from reportlab.lib.units import cm
+
+# Sheet used when config/sheet.json is missing: A4 sheet of 8 x 3 stickers of 6.5 x 3.4 cm. The slots are numbered
+# from the second row to the seventh, then the first row, then the last one (all lengths in cm)
+DEFAULT_SHEET = {
+    'page_width': 21.0,
+    'page_height': 29.7,
+    'rows': 8,
+    'columns': 3,
+    'sticker_width': 6.5,
+    'sticker_height': 3.4,
+    'column_pitch': 7.0,
+    'row_pitch': 3.71,
+    'left_margin': 0.2,
+    'bottom_margin': 0.00833,
+    'min_stickers_left': 6,
+    'fill_order': [[row, column] for row in [1, 2, 3, 4, 5, 6, 0, 7] for column in range(3)],
+}
+
+loaded_sheets = {}
+loaded_sheets_lock = Lock()
+
+
+class SheetLayout:
+    """
+    Class to represent a sheet of stickers, with the fill order and the position of every slot precomputed once
+    """
+    def __init__(self, definition):
+        """
+        SheetLayout constructor
+        :param definition: Sheet definition (see DEFAULT_SHEET), lengths in cm and fill order as [row, column] from the
+                           top left of the sheet
+        :return: None
+        :raises Exception: If the fill order does not contain every slot of the sheet exactly once
+        """
+        self.definition = definition
+        self.page_size = (definition['page_width'] * cm, definition['page_height'] * cm)
+        self.sticker_width = definition['sticker_width'] * cm
+        self.sticker_height = definition['sticker_height'] * cm
+        self.min_stickers_left = definition['min_stickers_left']
+
+        rows, columns = definition['rows'], definition['columns']
+        fill_order = [tuple(slot) for slot in definition['fill_order']]
+        if sorted(fill_order) != [(row, column) for row in range(rows) for column in range(columns)]:
+            raise Exception("Invalid fill order", fill_order)
+
+        self.slots = tuple(
+            ((definition['left_margin'] + column * definition['column_pitch']) * cm,
+             (definition['bottom_margin'] + (rows - 1 - row) * definition['row_pitch']) * cm)
+            for row, column in fill_order
+        )
+        self.slots_per_page = len(self.slots)
+
+    @staticmethod
+    def load(path=os.path.join("config", "sheet.json")):
+        """
+        Get the sheet layout of a sheet definition file, loaded once per file (and again when the file changes)
+        :param path: Path to the sheet definition, DEFAULT_SHEET is used if the file does not exist
+        :return: The SheetLayout of the file
+        """
+        stamp = None
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with loaded_sheets_lock:
+            entry = loaded_sheets.get(path)
+            if entry is None or entry[0] != stamp:
+                definition = dict(DEFAULT_SHEET)
+                if stamp is not None:
+                    with open(path, encoding="utf-8-sig") as f:
+                        definition.update(json.load(f))
+                entry = loaded_sheets[path] = (stamp, SheetLayout(definition))
+            return entry[1]
+
+    def normalize_stickers_left(self, stickers_left):
+        """
+        Get the number of stickers left on the first page to use
+        :param stickers_left: Number of stickers left given by the user | None or 0 for a full page
+        :return: The number of stickers left on the first page
+        :raises Exception: If there are not enough stickers left on the page (or a negative number)
+        """
+        if stickers_left is None or stickers_left == 0 or stickers_left > self.slots_per_page:
+            return self.slots_per_page
+        if stickers_left < 0 or self.min_stickers_left > stickers_left:
+            raise Exception('Not enough stickers left to print the page')
+        return stickers_left
+
+    def pages(self, stickers, stickers_left=None):
+        """
+        Places stickers on pages, in fill order, starting on the first page after the slots already used
+        :param stickers: Iterable of the stickers to place, consumed as the pages are filled
+        :param stickers_left: Number of stickers left on the first page | None or 0 for a full page
+        :return: Iterator over the pages, each page is a list of (sticker, x, y) with x, y the bottom left corner of the
+                 sticker in points
+        :raises Exception: If there are not enough stickers left on the first page
+        """
+        first_slot = self.slots_per_page - self.normalize_stickers_left(stickers_left)
+        page = []
+        slot = first_slot
+        for sticker in stickers:
+            x, y = self.slots[slot]
+            page.append((sticker, x, y))
+            slot += 1
+            if slot == self.slots_per_page:
+                yield page
+                page = []
+                slot = 0
+        if page:
+            yield page
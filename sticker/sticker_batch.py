@@ -0,0 +1,121 @@
+from typing import NamedTuple
+
+from sticker.sticker_generation import StickerGenerator
+from sticker.sticker_type import StickerType
+from sticker.sticker_values import StickerValues
+
+# Below this number of records, starting worker processes costs more than rendering the stickers
+PARALLEL_MIN_RECORDS = 16
+
+
+class BatchRecord(NamedTuple):
+    """
+    Record of a batch: a sticker type, its values and the number of stickers to print with these values
+    """
+    sticker: StickerType
+    values: StickerValues
+    count: int
+
+
+class StickerBatch:
+    """
+    Class that contains different stickers (types and values) to print one after the other in a single pdf
+    """
+    def __init__(self, records=None):
+        """
+        StickerBatch constructor
+        :param records: Iterable of (sticker type, values, count) to add to the batch
+        :return: None
+        """
+        self.records = []
+        if records is not None:
+            self.add_all(records)
+
+    def __iter__(self):
+        """
+        Iterate over the records of the batch, in printing order
+        :return: An iterator over the BatchRecord of the batch
+        """
+        return iter(self.records)
+
+    def __len__(self):
+        """
+        Number of records in the batch
+        :return: The number of records in the batch
+        """
+        return len(self.records)
+
+    def add(self, sticker, values, count=1):
+        """
+        Add a record to the batch
+        :param sticker: Sticker type of the record
+        :param values: Values of the record by data name (not changed, the record gets its StickerValues with the dates
+                       converted to dd/mm/yyyy)
+        :param count: Number of stickers to print with these values
+        :return: None
+        :raises Exception: If the values are not valid for the sticker type or the count is not positive
+        """
+        self.add_all([(sticker, values, count)])
+
+    def add_all(self, records):
+        """
+        Add records to the batch, all of them or none: every record is checked first and all the errors are reported
+        :param records: Iterable of (sticker type, values by data name, count)
+        :return: None
+        :raises Exception: If a count is not positive, or if values are not valid, with a FieldError (see
+                           StickerValidator) for each invalid value of each record
+        """
+        batch_records = []
+        errors = []
+        for i, (sticker, values, count) in enumerate(records):
+            if count < 1:
+                raise Exception("Invalid count", sticker.name, count)
+            record, record_errors = sticker.validator.check(values, i)
+            errors.extend(record_errors)
+            batch_records.append(BatchRecord(sticker, record, count))
+        if errors:
+            raise Exception("Invalid values", *errors)
+        self.records.extend(batch_records)
+
+    def get_total_stickers(self):
+        """
+        Get the number of stickers to print for the whole batch
+        :return: The total number of stickers
+        """
+        return sum(record.count for record in self.records)
+
+    def get_sticker_types(self):
+        """
+        Get the distinct sticker types of the batch
+        :return: A list of the sticker types used by the records
+        """
+        sticker_types = {}
+        for record in self.records:
+            sticker_types.setdefault(record.sticker.name, record.sticker)
+        return list(sticker_types.values())
+
+    def generate(self, save_file_path, state_callback=None, stickers_left=None, workers=1, backend="raster",
+                 optimize=True, use_pdf_cache=True):
+        """
+        Generate the stickers of the batch in a single pdf file
+        :param save_file_path: Path to save the pdf to
+        :param state_callback: Callback function for updating progress bar states corresponding to the current state
+        :param stickers_left: Number of stickers left on the first page | default: None (full page)
+        :param workers: Number of processes rendering the stickers | default: 1 (no process pool), None for the number
+                        of CPUs. Batches smaller than PARALLEL_MIN_RECORDS are always rendered in this process, the
+                        vector backend never uses processes
+        :param backend: Rendering backend (raster or vector) | default: raster
+        :param optimize: True to write a smaller pdf (see StickerCanvas) | default: True
+        :param use_pdf_cache: True to copy the pdf from the pdf cache when the batch was generated before | default: True
+        :return: Measured duration in seconds of each generation stage, by state
+        """
+        sticker_generator = StickerGenerator(state_callback, optimize=optimize, use_pdf_cache=use_pdf_cache)
+        if workers == 1 or len(self.records) < PARALLEL_MIN_RECORDS or backend != "raster":
+            return sticker_generator.generate_batch(self, save_file_path, stickers_left=stickers_left,
+                                                    backend=backend)
+
+        # imported only when needed, multiprocessing is slow to import and most batches are rendered in this process
+        from sticker.parallel_rendering import ParallelStickerRenderer
+        with ParallelStickerRenderer(self.get_sticker_types(), workers=workers) as renderer:
+            return sticker_generator.generate_batch(self, save_file_path, stickers_left=stickers_left,
+                                                    renderer=renderer)
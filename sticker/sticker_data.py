@@ -4,9 +4,13 @@ from abc import ABC
 class StickerData(ABC):
     """
     Base class for sticker data (Abstract class)
+    A sticker data is a template: it describes a field of a sticker type and never changes, the values of a sticker are
+    given separately for each job (see StickerValues)
     """
+    __slots__ = ('name', 'inlineprefix', 'inlinesuffix', 'blockprefix', 'blocksuffix', 'font', 'prefixfont',
+                 'suffixfont')
+
     def __init__(self, name,
-                 value=None,
                  inlineprefix=None,
                  inlinesuffix=None,
                  blockprefix=None,
@@ -17,7 +21,6 @@ class StickerData(ABC):
         """
         StickerData class constructor
         :param name: Name of the sticker data
-        :param value: Value of the sticker data
         :param inlineprefix: Prefix to add inline before the value when printing the sticker
         :param inlinesuffix: Suffix to add inline after the value when printing the sticker
         :param blockprefix: Prefix to add in a block before the value when printing the sticker
@@ -27,21 +30,60 @@ class StickerData(ABC):
         :param suffixfont: Font to use for the suffix when printing the sticker
         :return: None
         """
-        self.name = name
-        self.value = value
-        self.inlineprefix = inlineprefix
-        self.inlinesuffix = inlinesuffix
-        self.blockprefix = blockprefix
-        self.blocksuffix = blocksuffix
-        self.font = font
-        self.prefixfont = prefixfont or font
-        self.suffixfont = suffixfont or font
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'inlineprefix', inlineprefix)
+        object.__setattr__(self, 'inlinesuffix', inlinesuffix)
+        object.__setattr__(self, 'blockprefix', blockprefix)
+        object.__setattr__(self, 'blocksuffix', blocksuffix)
+        object.__setattr__(self, 'font', font)
+        object.__setattr__(self, 'prefixfont', prefixfont or font)
+        object.__setattr__(self, 'suffixfont', suffixfont or font)
+
+    def __setattr__(self, name, value):
+        """
+        Sticker data can not be changed
+        :raises AttributeError: Always
+        """
+        raise AttributeError("StickerData is immutable")
+
+    def __delattr__(self, name):
+        """
+        Sticker data can not be changed
+        :raises AttributeError: Always
+        """
+        raise AttributeError("StickerData is immutable")
+
+    def __getstate__(self):
+        """
+        State of the sticker data for pickling (e.g. to send it to a rendering process)
+        :return: The attributes of the sticker data, by name
+        """
+        return self.get_attributes()
+
+    def __setstate__(self, state):
+        """
+        Restore the sticker data from a pickled state
+        :param state: Attributes of the sticker data, by name
+        :return: None
+        """
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def get_attributes(self):
+        """
+        Get the attributes of the sticker data
+        :return: The attributes by name, in declaration order
+        """
+        return {name: getattr(self, name)
+                for cls in reversed(type(self).__mro__) for name in getattr(cls, '__slots__', ())}
 
 
 class StickerDataNumber(StickerData):
     """
     Class for sticker data of type number
     """
+    __slots__ = ()
+
     def __init__(self, name, **kwargs):
         """
         StickerDataNumber class constructor
@@ -56,6 +98,8 @@ class StickerDataText(StickerData):
     """
     Class for sticker data of type text
     """
+    __slots__ = ()
+
     def __init__(self, name, **kwargs):
         """
         StickerDataText class constructor
@@ -70,6 +114,8 @@ class StickerDataDate(StickerData):
     """
     Class for sticker data of type date
     """
+    __slots__ = ()
+
     def __init__(self, name, **kwargs):
         """
         StickerDataDate class constructor
@@ -84,6 +130,8 @@ class StickerDataList(StickerData):
     """
     Class for sticker data of type list
     """
+    __slots__ = ('values',)
+
     def __init__(self, name, values, **kwargs):
         """
         StickerDataList class constructor
@@ -93,4 +141,4 @@ class StickerDataList(StickerData):
         :return: None
         """
         super().__init__(name, **kwargs)
-        self.values = values
+        object.__setattr__(self, 'values', tuple(values))
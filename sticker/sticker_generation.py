@@ -1,139 +1,265 @@
 import os
 import time
 
-from datetime import datetime
+from threading import Lock
+
+from PIL import ImageDraw, Image as PILImage
+
+from sticker.atomic_file import atomic_write
+from sticker.font_registry import FontRegistry
+from sticker.generation_state import StickerGenerationStates
+from sticker.lru_cache import LRUCache
+from sticker.pdf_cache import PdfCache
+from sticker.pdf_canvas import StickerCanvas
+from sticker.sheet_layout import SheetLayout
+from sticker.text_measurement import TextMeasurer
+from sticker.vector_renderer import VectorSticker, VectorText, get_pdf_font
+
+# Rendering backends: raster draws the stickers as images with PIL, vector writes them as pdf text on the logo
+BACKENDS = ("raster", "vector")
+# Version of the rendering, part of the pdf cache keys: change it when a change of the code changes the generated pdfs
+RENDERER_VERSION = 2
+# Default limits of the cache of rendered stickers: number of stickers and memory used by their images, in bytes
+RENDER_CACHE_MAXSIZE = 512
+RENDER_CACHE_MAX_WEIGHT = 128 * 1024 * 1024
+
+
+class StickerImage:
+    """
+    Rendered sticker drawn straight from memory (no intermediate image file)
+    """
+    def __init__(self, image):
+        """
+        StickerImage constructor
+        :param image: Rendered sticker (PIL image) or path to a sticker image
+        :return: None
+        """
+        self.image = image
+
+    def draw_on(self, canvas, x, y, width, height):
+        """
+        Draws the sticker on a canvas, the image is embedded only once in the pdf however often it is drawn
+        :param canvas: StickerCanvas of the pdf
+        :param x: X coordinate of the bottom left corner of the sticker
+        :param y: Y coordinate of the bottom left corner of the sticker
+        :param width: Width of the sticker on the page
+        :param height: Height of the sticker on the page
+        :return: None
+        """
+        canvas.draw_shared_image(self.image, x, y, width, height)
 
-from PIL import ImageFont, ImageDraw, Image as PILImage
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
 
-from UI.widgets.pdf_gen_progress_bar import StickerGenProgressBar
+def get_drawing_weight(entry):
+    """
+    Gets the memory used by a cached sticker drawing, to limit the cache of rendered stickers
+    :param entry: (layout plan, drawing) entry of the cache
+    :return: The approximate size of the drawing in bytes
+    """
+    drawing = entry[1]
+    if isinstance(drawing, StickerImage) and not isinstance(drawing.image, str):
+        return drawing.image.width * drawing.image.height * len(drawing.image.getbands())
+    return 256 * len(getattr(drawing, 'texts', ())) + 256
 
 
 class StickerGenerator:
     """
     Class for generating stickers
     """
-    fonts = {
-        'normal': {
-            'font': ImageFont.truetype("segoeui.ttf", 20),
-            'real_size': None,
-        },
-        'bold': {
-            'font': ImageFont.truetype("segoeuib.ttf", 20),
-            'real_size': None,
-        },
-        'big': {
-            'font': ImageFont.truetype("segoeui.ttf", 26),
-            'real_size': None,
-        },
-        'big_bold': {
-            'font': ImageFont.truetype("segoeuib.ttf", 26),
-            'real_size': None,
-        },
-    }
-
-    def __init__(self, state_callback=None):
+    fonts = FontRegistry()
+    text_measurer = TextMeasurer(fonts)
+    logo_template = None
+    base_images = {}
+    templates_lock = Lock()
+    pdf_cache = PdfCache()
+    rendered_stickers = LRUCache(RENDER_CACHE_MAXSIZE, RENDER_CACHE_MAX_WEIGHT, get_drawing_weight)
+
+    def __init__(self, state_callback=None, sheet=None, optimize=True, use_pdf_cache=True):
         """
         StickerGenerator constructor
         :param state_callback: Callback function for updating progress bar states corresponding to the current state
+        :param sheet: SheetLayout of the sticker sheets | default: the one of config/sheet.json
+        :param optimize: True to write smaller pdfs (images flattened, see StickerCanvas)
+        :param use_pdf_cache: True to copy the pdf from the pdf cache when the same stickers were generated before
         :return: None
         """
         self.state_callback = state_callback
-        StickerGenerator.__generate_fonts_real_sizes()
-
-    def generate_stickers(self, sticker, save_file_path, **kwargs):
+        self.sheet = sheet if sheet is not None else SheetLayout.load()
+        self.optimize = optimize
+        self.use_pdf_cache = use_pdf_cache
+        self.pdf_size = None
+        self.pdf_cache_hit = False
+        self.stage_durations = {}
+        self.current_state = None
+        self.current_state_start = None
+
+    def generate_stickers(self, sticker, values, save_file_path, stickers_left=None, total_stickers=None,
+                          backend="raster"):
         """
         Generates stickers in a pdf file
         :param sticker: Sticker to generate
+        :param values: StickerValues of the stickers (see StickerType.validate)
         :param save_file_path: Path to which the pdf will be saved
-        :param kwargs: Keyword arguments for the pdf generation (stickers_left, total_stickers)
-        :return: None
+        :param stickers_left: Number of stickers left on the page | default: None (full page)
+        :param total_stickers: Number of stickers to print | default: None (full page)
+        :param backend: Rendering backend, one of BACKENDS | default: raster
+        :return: Measured duration in seconds of each generation stage, by state
         """
-        time.sleep(1.5)
-        self.update_state_if_needed(StickerGenProgressBar.StickerProgressBarStates.GENERATING_IMG)
-        sticker_img_path = StickerGenerator.create_sticker(sticker)
+        if total_stickers is None:
+            total_stickers = self.sheet.slots_per_page
+
+        self.stage_durations = {}
+        cache_key = self.get_pdf_cache_key([(sticker, values, total_stickers)], stickers_left, backend)
+        if self.load_cached_pdf(cache_key, save_file_path):
+            return self.stage_durations
+
+        self.enter_state(StickerGenerationStates.GENERATING_IMG)
+        sticker_drawing = StickerGenerator.create_sticker_drawing(sticker, values, backend)
+
+        self.build_pdf(save_file_path, [sticker_drawing] * total_stickers, stickers_left)
+        self.store_cached_pdf(cache_key, save_file_path)
 
-        self.state_callback(StickerGenProgressBar.StickerProgressBarStates.GENERATING_PDF)
-        self.generate_pdf(save_file_path, sticker_img_path, **kwargs)
+        return self.stage_durations
 
-    def generate_pdf(self, save_file_path, sticker_img_path, stickers_left=24, total_stickers=24):
+    def generate_batch(self, batch, save_file_path, stickers_left=None, renderer=None, backend="raster"):
+        """
+        Generates the stickers of a batch (different sticker types and values) in a single pdf file
+        :param batch: StickerBatch to generate, its records are laid out in order
+        :param save_file_path: Path to which the pdf will be saved
+        :param stickers_left: Number of stickers left on the first page | default: None (full page)
+        :param renderer: ParallelStickerRenderer rendering the records in worker processes | None to render them here
+                         (only used by the raster backend)
+        :param backend: Rendering backend, one of BACKENDS | default: raster
+        :return: Measured duration in seconds of each generation stage, by state
+        """
+        self.stage_durations = {}
+        cache_key = self.get_pdf_cache_key(batch, stickers_left, backend)
+        if self.load_cached_pdf(cache_key, save_file_path):
+            return self.stage_durations
+
+        self.enter_state(StickerGenerationStates.GENERATING_IMG)
+        drawings = StickerGenerator.create_sticker_drawings(batch, backend, renderer)
+        render_time = 0
+
+        def stickers():
+            # the drawings are rendered as the pages are laid out, the time spent rendering them counts as rendering
+            nonlocal render_time
+            for record in batch:
+                start = time.perf_counter()
+                sticker_drawing = next(drawings)
+                render_time += time.perf_counter() - start
+                for _ in range(record.count):
+                    yield sticker_drawing
+
+        self.build_pdf(save_file_path, stickers(), stickers_left)
+        self.stage_durations[StickerGenerationStates.GENERATING_PDF] -= render_time
+        self.stage_durations[StickerGenerationStates.GENERATING_IMG] += render_time
+        self.store_cached_pdf(cache_key, save_file_path)
+
+        return self.stage_durations
+
+    def generate_pdf(self, save_file_path, sticker_img, stickers_left=None, total_stickers=None):
         """
         Creates a pdf file with a sticker image
         :param save_file_path: Path to which the pdf will be saved
-        :param sticker_img_path: Path to the sticker image
-        :param stickers_left: Number of stickers left on the page | default: 24 (full page)
-        :param total_stickers: Number of stickers to print | default: 24 (full page)
+        :param sticker_img: Rendered sticker (PIL image) or path to a sticker image
+        :param stickers_left: Number of stickers left on the page | default: None (full page)
+        :param total_stickers: Number of stickers to print | default: None (full page)
         :return: None
         """
         if total_stickers is None:
-            total_stickers = 24
-
-        if stickers_left is None or stickers_left == 0 or stickers_left > 24:
-            stickers_left = 24
-        elif 6 > stickers_left > 0:
-            raise Exception('Not enough stickers left to print the page')
-
-        file_existed = os.path.exists(save_file_path)
-        now = datetime.now()
-
-        doc = SimpleDocTemplate(save_file_path, pagesize=A4, topMargin=-.2 * cm, bottomMargin=-.6 * cm,
-                                leftMargin=0 * cm, rightMargin=0)
-        flowables = []
-        img = Image(sticker_img_path, width=6.5 * cm, height=3.4 * cm)
-
-        tblstyle = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 7), colors.white),
-            ('LEFTPADDING', (0, 0), (-1, 7), .2 * cm),
-            ('RIGHTPADDING', (0, 0), (-1, 7), .2 * cm),
-            ('TOPPADDING', (0, 0), (-1, 7), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, 7), 0),
-        ])
-        table_template = [
-            [19, 20, 21],
-            [1, 2, 3],
-            [4, 5, 6],
-            [7, 8, 9],
-            [10, 11, 12],
-            [13, 14, 15],
-            [16, 17, 18],
-            [22, 23, 24],
-        ]
-
-        while total_stickers > 0:
-            start_number = 24 - stickers_left + 1
-            data = table_template.copy()
-
-            for i in range(start_number,
-                           start_number + total_stickers if total_stickers < 24 - start_number + 1 else 25):
-                data = [[_el if _el != i else img for _el in _ar] for _ar in data]
-                total_stickers -= 1
-
-            data = [["" if not isinstance(_el, Image) else img for _el in _ar] for _ar in data]
-            tbl = Table(data, colWidths=7 * cm, rowHeights=3.71 * cm)
-            tbl.setStyle(tblstyle)
-            flowables.append(tbl)
-
-            stickers_left = 24
-
-        doc.build(flowables)
-
-        timeout = 0
-        while not ((os.path.exists(save_file_path) or file_existed) and now.timestamp() < os.path.getmtime(
-                save_file_path)):
-            time.sleep(0.1)
-            print("Waiting for pdf generation...")
-            timeout += 1
-            if timeout > 300:
-                raise Exception("Timeout while waiting for pdf generation")
-
-        self.update_state_if_needed(StickerGenProgressBar.StickerProgressBarStates.DELETING_IMG)
-        time.sleep(1)
-        os.remove(sticker_img_path)
-        self.update_state_if_needed(StickerGenProgressBar.StickerProgressBarStates.DONE)
-        time.sleep(0.5)
+            total_stickers = self.sheet.slots_per_page
+
+        img = StickerImage(sticker_img)
+        self.build_pdf(save_file_path, [img] * total_stickers, stickers_left)
+
+    def build_pdf(self, save_file_path, stickers, stickers_left=None):
+        """
+        Creates a pdf file with stickers, placed on the slots of the sheet in fill order
+        The pdf is written to a temporary file renamed to save_file_path once complete, so it is ready when this returns
+        :param save_file_path: Path to which the pdf will be saved
+        :param stickers: Iterable of the drawing (StickerImage or VectorSticker) of each sticker to print, in printing
+                         order, consumed as the pages are filled (a drawing repeated in it is embedded only once)
+        :param stickers_left: Number of stickers left on the first page | default: None (full page)
+        :return: None
+        :raises Exception: If there are not enough stickers left on the first page
+        """
+        sheet = self.sheet
+        stickers_left = sheet.normalize_stickers_left(stickers_left)
+
+        self.enter_state(StickerGenerationStates.GENERATING_PDF)
+        with atomic_write(save_file_path) as pdf_file:
+            canvas = StickerCanvas(pdf_file, sheet.page_size, optimize=self.optimize)
+            for page in sheet.pages(stickers, stickers_left):
+                for sticker_drawing, x, y in page:
+                    sticker_drawing.draw_on(canvas, x, y, sheet.sticker_width, sheet.sticker_height)
+                canvas.showPage()
+            canvas.save()
+            self.pdf_size = pdf_file.tell()
+
+        self.enter_state(StickerGenerationStates.DONE)
+
+    def get_pdf_cache_key(self, records, stickers_left, backend):
+        """
+        Gets the pdf cache key of stickers: the sticker types and values, the sheet, the fonts (their configuration and
+        the files used), the logo and the rendering version and options
+        :param records: Iterable of (sticker type, values, count), in printing order
+        :param stickers_left: Number of stickers left on the first page
+        :param backend: Rendering backend, one of BACKENDS
+        :return: The cache key, None if the pdf cache is not used
+        :raises Exception: If there are not enough stickers left on the first page
+        """
+        stickers_left = self.sheet.normalize_stickers_left(stickers_left)
+        if not self.use_pdf_cache:
+            return None
+
+        logo_stamp = StickerGenerator.get_logo()[0]
+        return PdfCache.get_key(RENDERER_VERSION, backend, self.optimize, self.sheet.definition,
+                                StickerGenerator.fonts.get_config(), StickerGenerator.fonts.get_files_stamp(),
+                                logo_stamp[1:], stickers_left,
+                                [[sticker.get_definition(), dict(values), count] for sticker, values, count in records])
+
+    def load_cached_pdf(self, cache_key, save_file_path):
+        """
+        Copies the pdf from the pdf cache if it was generated before
+        :param cache_key: Cache key of the pdf | None if the pdf cache is not used
+        :param save_file_path: Path to which the pdf will be saved
+        :return: True if the pdf was copied from the cache (generation done), False if it has to be generated
+        """
+        if cache_key is None:
+            return False
+
+        self.pdf_size = StickerGenerator.pdf_cache.get(cache_key, save_file_path)
+        self.pdf_cache_hit = self.pdf_size is not None
+        if self.pdf_cache_hit:
+            self.enter_state(StickerGenerationStates.DONE)
+        return self.pdf_cache_hit
+
+    def store_cached_pdf(self, cache_key, save_file_path):
+        """
+        Stores a generated pdf in the pdf cache
+        :param cache_key: Cache key of the pdf | None if the pdf cache is not used
+        :param save_file_path: Path of the generated pdf
+        :return: None
+        """
+        if cache_key is not None:
+            StickerGenerator.pdf_cache.put(cache_key, save_file_path)
+
+    def enter_state(self, state):
+        """
+        Ends the current generation stage, records its measured duration and starts the next one
+        :param state: State of the stage that starts now
+        :return: None
+        """
+        now = time.perf_counter()
+        if self.current_state is not None:
+            self.stage_durations[self.current_state] = now - self.current_state_start
+        if state == StickerGenerationStates.DONE:
+            self.current_state = None
+            self.current_state_start = None
+        else:
+            self.current_state = state
+            self.current_state_start = now
+        self.update_state_if_needed(state)
 
     def update_state_if_needed(self, state):
         """
@@ -145,170 +271,247 @@ class StickerGenerator:
             self.state_callback(state)
 
     @staticmethod
-    def create_sticker(sticker):
+    def create_sticker(sticker, values):
         """
-        Creates a sticker image
+        Creates a sticker image from the compiled layout of the sticker type, only the values are measured
         :param sticker: Sticker to generate
-        :return: Path to the generated sticker image
+        :param values: Values of the sticker by data name (e.g. StickerValues)
+        :return: The generated sticker image (PIL image), kept in memory
+        :raises Exception: If a line is too long
         """
-        img = PILImage.open(os.getcwd() + "\\sticker_img\\agrocentre_logo.png")
+        img = StickerGenerator.get_base_image(sticker).copy()
         draw = ImageDraw.Draw(img)
 
-        text_y_coordinates = 0
-        width = 301 - 84
-        for data in sticker.data:
+        for line in sticker.layout.value_lines:
+            prefix, value, suffix = sticker.layout.place_value_line(line, values[line.name])
+            for element in (prefix, suffix):
+                if element is not None:
+                    StickerGenerator.draw_element(draw, element)
+            if not StickerGenerator.paste_glyph(img, line, value):
+                StickerGenerator.draw_element(draw, value)
+
+        return img
+
+    @staticmethod
+    def create_vector_sticker(sticker, values):
+        """
+        Creates a vector sticker, laid out with the same compiled layout as the sticker images
+        The sticker is rendered as an image (raster) if a font can not be embedded in the pdf (see get_pdf_font)
+        :param sticker: Sticker to generate
+        :param values: Values of the sticker by data name (e.g. StickerValues)
+        :return: The VectorSticker of the sticker | its StickerImage if a font can not be embedded
+        :raises Exception: If a line is too long
+        """
+
+        elements = list(sticker.layout.static_elements)
+        for line in sticker.layout.value_lines:
+            elements.extend(element for element in sticker.layout.place_value_line(line, values[line.name])
+                            if element is not None)
 
-            prefix_line_offset, main_line_offset, suffix_line_offset = StickerGenerator.get_lines_offsets(sticker,
-                                                                                                          data,
-                                                                                                          width)
+        texts = []
+        for element in elements:
+            font = StickerGenerator.fonts[element.font]
+            pdf_font = get_pdf_font(element.font, font)
+            if pdf_font is None:
+                return StickerImage(StickerGenerator.create_sticker(sticker, values))
+            ascent = font['font'].getmetrics()[0]
+            texts.append(VectorText(element.text, pdf_font, font['font'].size, element.x, element.y + ascent))
 
-            if data.blockprefix:
-                StickerGenerator.draw_element(data, draw, prefix_line_offset, text_y_coordinates, "blockprefix")
-                text_y_coordinates += StickerGenerator.fonts[data.prefixfont]['real_size']
+        logo = StickerGenerator.get_logo()[1]
+        return VectorSticker(logo, logo.size, texts)
 
-            if data.inlineprefix:
-                StickerGenerator.draw_element(data, draw, main_line_offset, text_y_coordinates, "inlineprefix")
-                main_line_offset += StickerGenerator.get_text_width(data.inlineprefix,
-                                                                    StickerGenerator.fonts[data.prefixfont])
+    @staticmethod
+    def create_sticker_drawing(sticker, values, backend="raster"):
+        """
+        Gets the drawing of a sticker (what is drawn on its slots of the pdf) with a rendering backend, from the cache of
+        rendered stickers if the same sticker was rendered before
+        :param sticker: Sticker to generate
+        :param values: Values of the sticker by data name (e.g. StickerValues)
+        :param backend: Rendering backend, one of BACKENDS | default: raster
+        :return: StickerImage (raster) or VectorSticker (vector) of the sticker, it must not be modified
+        :raises Exception: If the backend is unknown or a line is too long
+        """
 
-            StickerGenerator.draw_element(data, draw, main_line_offset, text_y_coordinates, "value")
-            main_line_offset += StickerGenerator.get_text_width(data.value, StickerGenerator.fonts[data.font])
+        key = StickerGenerator.get_render_key(sticker, values, backend, StickerGenerator.get_logo()[0])
+        entry = StickerGenerator.rendered_stickers.get(key)
+        if entry is not None and entry[0] is sticker.layout:
+            return entry[1]
 
-            if data.inlinesuffix:
-                StickerGenerator.draw_element(data, draw, main_line_offset, text_y_coordinates, "inlinesuffix")
-                main_line_offset += StickerGenerator.get_text_width(data.inlinesuffix,
-                                                                    StickerGenerator.fonts[data.suffixfont])
+        sticker_drawing = StickerGenerator.render_sticker_drawing(sticker, values, backend)
+        StickerGenerator.rendered_stickers.put(key, (sticker.layout, sticker_drawing))
+        return sticker_drawing
 
-            biggest_font = StickerGenerator.fonts[data.font]['real_size']
-            if StickerGenerator.fonts[data.prefixfont]['real_size'] > biggest_font:
-                biggest_font = StickerGenerator.fonts[data.prefixfont]['real_size']
-            elif StickerGenerator.fonts[data.suffixfont]['real_size'] > biggest_font:
-                biggest_font = StickerGenerator.fonts[data.suffixfont]['real_size']
+    @staticmethod
+    def create_sticker_drawings(records, backend="raster", renderer=None):
+        """
+        Gets the drawings of the stickers of records, each distinct sticker is rendered once (and not at all if it is in
+        the cache of rendered stickers)
+        :param records: Iterable of records with sticker and values (e.g. a StickerBatch)
+        :param backend: Rendering backend, one of BACKENDS | default: raster
+        :param renderer: ParallelStickerRenderer rendering the stickers in worker processes | None to render them here
+                         (only used by the raster backend)
+        :return: Iterator over the drawing of each record, in the order of the records
+        :raises Exception: If the backend is unknown or a line is too long
+        """
+        records = list(records)
+        logo_stamp = StickerGenerator.get_logo()[0]
+        keys = [StickerGenerator.get_render_key(record.sticker, record.values, backend, logo_stamp)
+                for record in records]
+
+        drawings = {}
+        to_render = {}
+        for key, record in zip(keys, records):
+            if key in drawings or key in to_render:
+                continue
+            entry = StickerGenerator.rendered_stickers.get(key)
+            if entry is not None and entry[0] is record.sticker.layout:
+                drawings[key] = entry[1]
+            else:
+                to_render[key] = record
+
+        if backend == "raster" and renderer is not None:
+            rendered = (StickerImage(image) for image in renderer.render(to_render.values()))
+        else:
+            rendered = (StickerGenerator.render_sticker_drawing(record.sticker, record.values, backend)
+                        for record in to_render.values())
+
+        for key in keys:
+            if key not in drawings:
+                drawings[key] = next(rendered)
+                StickerGenerator.rendered_stickers.put(key, (to_render[key].sticker.layout, drawings[key]))
+            yield drawings[key]
 
-            text_y_coordinates += biggest_font
+    @staticmethod
+    def render_sticker_drawing(sticker, values, backend="raster"):
+        """
+        Renders the drawing of a sticker with a rendering backend, without the cache of rendered stickers
+        :param sticker: Sticker to generate
+        :param values: Values of the sticker by data name
+        :param backend: Rendering backend, one of BACKENDS | default: raster
+        :return: StickerImage (raster) or VectorSticker (vector) of the sticker
+        :raises Exception: If the backend is unknown or a line is too long
+        """
+        if backend == "raster":
+            return StickerImage(StickerGenerator.create_sticker(sticker, values))
+        if backend == "vector":
+            return StickerGenerator.create_vector_sticker(sticker, values)
+        raise Exception("Unknown rendering backend", backend)
 
-            if data.blocksuffix:
-                StickerGenerator.draw_element(data, draw, suffix_line_offset, text_y_coordinates, "blocksuffix")
-                text_y_coordinates += StickerGenerator.fonts[data.suffixfont]['real_size']
+    @staticmethod
+    def get_render_key(sticker, values, backend, logo_stamp):
+        """
+        Gets the key of a sticker in the cache of rendered stickers: the sticker type, its values (only the ones it
+        prints, in the order of its data), the backend and the logo file
+        :param sticker: Sticker type
+        :param values: Values of the sticker by data name
+        :param backend: Rendering backend
+        :param logo_stamp: Stamp of the logo file (see get_logo), taken once for all the stickers of a batch
+        :return: The key of the sticker
+        """
+        return (sticker.name, backend, logo_stamp, tuple(values.get(data.name) for data in sticker.data))
 
-            text_y_coordinates += 10
+    @staticmethod
+    def paste_glyph(img, line, element):
+        """
+        Pastes the pre-rendered bitmap of a value on the sticker image instead of drawing its text
+        :param img: Sticker image
+        :param line: ValueLine of the value (its atlas holds the pre-rendered values)
+        :param element: Placed value (TextElement)
+        :return: True if the value was pasted, False if it is not pre-rendered and has to be drawn
+        """
+        if line.atlas is None or element.text not in line.atlas:
+            return False
 
-        sticker_path = os.path.join(os.getcwd(), "tmp", "sticker.png")
-        img.save(sticker_path)
+        x = int(element.x)
+        bitmap = line.atlas[element.text].bitmaps.get(element.x - x)
+        if bitmap is None:
+            return False
 
-        return sticker_path
+        mask, offset_x, offset_y = bitmap
+        img.paste((0, 0, 0), (x + offset_x, int(element.y) + offset_y), mask)
+        return True
 
     @staticmethod
-    def __generate_fonts_real_sizes():
+    def get_logo():
         """
-        Generates the real sizes of the fonts
-        Only needs to be called once
-        :return: None
+        Gets the decoded logo, the file is decoded again only when it changed on disk
+        :return: (stamp of the logo file, logo image), the image must not be modified
         """
-        if StickerGenerator.fonts['normal']['real_size'] is None:
-            for key in StickerGenerator.fonts:
-                ascent, descent = StickerGenerator.fonts[key]['font'].getmetrics()
-                StickerGenerator.fonts[key]['real_size'] = \
-                    StickerGenerator.fonts[key]['font'].getmask("AjQlafTB").getbbox()[3] - descent + 5
+        logo_path = os.path.join(os.getcwd(), "sticker_img", "agrocentre_logo.png")
+        stat = os.stat(logo_path)
+        stamp = (logo_path, stat.st_mtime_ns, stat.st_size)
+
+        with StickerGenerator.templates_lock:
+            if StickerGenerator.logo_template is None or StickerGenerator.logo_template[0] != stamp:
+                logo = PILImage.open(logo_path)
+                logo.load()
+                StickerGenerator.logo_template = (stamp, logo)
+            return StickerGenerator.logo_template
 
     @staticmethod
-    def get_text_width(text, font_type):
+    def get_base_image(sticker):
         """
-        Calculates the width of a text
-        :param text: Text to calculate the width of
-        :param font_type: Font type used to calculate the width
-        :return: The width of the text
+        Gets the base image of a sticker type: the logo with all the static texts of the sticker type already drawn
+        The base image is drawn again when the logo file changes or when the sticker type is compiled again (new layout
+        plan, e.g. after model/data.json was reloaded)
+        :param sticker: Sticker type of the base image
+        :return: The base image, it must be copied before drawing on it
         """
-        return font_type['font'].getmask(text.replace(" ", "_")).getbbox()[2]
+        logo_stamp, logo = StickerGenerator.get_logo()
+
+        with StickerGenerator.templates_lock:
+            entry = StickerGenerator.base_images.get(sticker.name)
+            if entry is not None and entry[0] is sticker.layout and entry[1] == logo_stamp:
+                return entry[2]
+
+        img = logo.copy()
+        draw = ImageDraw.Draw(img)
+        for element in sticker.layout.static_elements:
+            StickerGenerator.draw_element(draw, element)
+
+        with StickerGenerator.templates_lock:
+            StickerGenerator.base_images[sticker.name] = (sticker.layout, logo_stamp, img)
+        return img
 
     @staticmethod
-    def get_line_size(data, elements):
+    def invalidate_templates():
         """
-        Calculates the size of a line
-        :param data: Data of the sticker to calculate the line size of
-        :param elements: Elements from the data that are in the line
-        :return: The total size of the line
+        Forgets the decoded logo, the base images and the rendered stickers, they are created again on next use
+        :return: None
         """
-        total_size = 0
-        for element in elements:
-            if element not in ["blockprefix", "blocksuffix", "inlineprefix", "inlinesuffix", "value"]:
-                raise Exception("Unknown element: " + element)
-
-            elif element == "blockprefix" and len(data.blockprefix) > 0:
-                total_size += StickerGenerator.get_text_width(data.blockprefix,
-                                                              StickerGenerator.fonts[data.prefixfont])
-            elif element == "blocksuffix" and len(data.blocksuffix) > 0:
-                total_size += StickerGenerator.get_text_width(data.blocksuffix,
-                                                              StickerGenerator.fonts[data.suffixfont])
-            elif element == "inlineprefix" and len(data.inlineprefix) > 0:
-                total_size += StickerGenerator.get_text_width(data.inlineprefix,
-                                                              StickerGenerator.fonts[data.prefixfont])
-            elif element == "inlinesuffix" and len(data.inlinesuffix) > 0:
-                total_size += StickerGenerator.get_text_width(data.inlinesuffix,
-                                                              StickerGenerator.fonts[data.suffixfont])
-            elif element == "value" and len(data.value) > 0:
-                total_size += StickerGenerator.get_text_width(data.value,
-                                                              StickerGenerator.fonts[data.font])
-
-        return total_size
+        with StickerGenerator.templates_lock:
+            StickerGenerator.logo_template = None
+            StickerGenerator.base_images = {}
+        StickerGenerator.rendered_stickers.clear()
 
     @staticmethod
-    def element_to_big(size, max_size):
+    def get_font_real_size(font_key):
         """
-        Checks if a line is too big for the sticker
-        :param size: Size of the line
-        :param max_size: Maximum size of the line
-        :return: True if the line is too big, False otherwise
+        Gets the real size (line height) of a font
+        :param font_key: Key of the font
+        :return: The real size of the font
         """
-        if size > max_size:
-            return True
-        return False
+        return StickerGenerator.fonts[font_key]['real_size']
 
     @staticmethod
-    def draw_element(data, draw, left_offset, text_y_coordinates, element_name):
+    def get_text_width(text, font_key):
         """
-        Draws an element of the sticker on the sticker image
-        :param data: Data of the sticker
+        Calculates the width of a text (memoized, see TextMeasurer)
+        :param text: Text to calculate the width of
+        :param font_key: Key of the font used to calculate the width
+        :return: The width of the text
+        """
+        return StickerGenerator.text_measurer.text_width(text, font_key)
+
+    @staticmethod
+    def draw_element(draw, element):
+        """
+        Draws a placed text element on the sticker image
         :param draw: ImageDraw object used to draw on the sticker image
-        :param left_offset: Offset of the element on the left (x coordinate to start drawing at)
-        :param text_y_coordinates: Y coordinate to start drawing at
-        :param element_name: Name of the element to draw of the sticker (present in the data (inlineprefix, value, ...)))
+        :param element: TextElement to draw
         :return: None
         """
-        if element_name == "inlineprefix":
-            StickerGenerator.draw_text(draw,
-                                       left_offset,
-                                       text_y_coordinates,
-                                       data.inlineprefix,
-                                       StickerGenerator.fonts[data.prefixfont]['font'])
-
-        if element_name == "inlinesuffix":
-            StickerGenerator.draw_text(draw,
-                                       left_offset,
-                                       text_y_coordinates,
-                                       data.inlinesuffix,
-                                       StickerGenerator.fonts[data.suffixfont]['font'])
-
-        if element_name == "blockprefix":
-            StickerGenerator.draw_text(draw,
-                                       left_offset,
-                                       text_y_coordinates,
-                                       data.blockprefix,
-                                       StickerGenerator.fonts[data.prefixfont]['font'])
-
-        if element_name == "blocksuffix":
-            StickerGenerator.draw_text(draw,
-                                       left_offset,
-                                       text_y_coordinates,
-                                       data.blocksuffix,
-                                       StickerGenerator.fonts[data.suffixfont]['font'])
-
-        if element_name == "value":
-            StickerGenerator.draw_text(draw,
-                                       left_offset,
-                                       text_y_coordinates,
-                                       data.value,
-                                       StickerGenerator.fonts[data.font]['font'])
+        StickerGenerator.draw_text(draw, element.x, element.y, element.text, StickerGenerator.fonts[element.font]['font'])
 
     @staticmethod
     def draw_text(draw, left_offset, text_y_coordinates, text, font):
@@ -325,47 +528,3 @@ class StickerGenerator:
                   text,
                   (0, 0, 0),
                   font=font)
-
-    @staticmethod
-    def get_lines_sizes(data, width):
-        """
-        Calculates the sizes of the lines of the sticker data
-        :param data: Data of the sticker to calculate the line sizes of
-        :param width: Maximum width of the sticker drawable area
-        :return: prefix_line_size, main_line_size, suffix_line_size
-        :raises Exception: If a line is too long
-        """
-        prefix_line_size = StickerGenerator.get_line_size(data, ["blockprefix"])
-        main_line_size = StickerGenerator.get_line_size(data, ["inlineprefix", "value", "inlinesuffix"])
-        suffix_line_size = StickerGenerator.get_line_size(data, ["blocksuffix"])
-
-        if StickerGenerator.element_to_big(prefix_line_size, width):
-            raise Exception("Line too long", data.name, data.blockprefix)
-        if StickerGenerator.element_to_big(main_line_size, width):
-            raise Exception("Line too long", data.name, data.inlinesuffix + data.value + data.inlinesuffix)
-        if StickerGenerator.element_to_big(suffix_line_size, width):
-            raise Exception("Line too long", data.name, data.blocksuffix)
-
-        return prefix_line_size, main_line_size, suffix_line_size
-
-    @staticmethod
-    def get_lines_offsets(sticker, data, width):
-        """
-        Calculates the offsets of the lines of the sticker data
-        :param sticker: Sticker to calculate the line offsets of
-        :param data: Data of the sticker to calculate the line offsets of
-        :param width: Maximum width of the sticker drawable area
-        :return: None
-        """
-        prefix_line_size, main_line_size, suffix_line_size = StickerGenerator.get_lines_sizes(data, width)
-
-        prefix_line_offset = 84
-        main_line_offset = 84
-        suffix_line_offset = 84
-
-        if sticker.align == 'center':
-            prefix_line_offset += (width - prefix_line_size) / 2
-            main_line_offset += (width - main_line_size) / 2
-            suffix_line_offset += (width - suffix_line_size) / 2
-
-        return prefix_line_offset, main_line_offset, suffix_line_offset
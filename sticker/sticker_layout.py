@@ -0,0 +1,205 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+from PIL import ImageDraw, Image as PILImage
+
+from sticker.sticker_data import StickerDataList
+from sticker.sticker_generation import StickerGenerator
+
+TEXT_AREA_LEFT = 84
+TEXT_AREA_RIGHT = 301
+FIELD_SPACING = 10
+# Fractional parts of the x coordinate a value can be drawn at (centering divides integer widths by 2)
+GLYPH_PHASES = (0.0, 0.5)
+
+
+class TextElement(NamedTuple):
+    """
+    Static text of a sticker, with its coordinates on the sticker image
+    """
+    text: str
+    font: str
+    x: float
+    y: float
+
+
+class InlineText(NamedTuple):
+    """
+    Static text drawn on the same line as a value (inline prefix or suffix), with its measured width
+    """
+    text: str
+    font: str
+    width: int
+
+
+class GlyphBitmap(NamedTuple):
+    """
+    Pre-rendered text of a list value, for each phase: the text mask and where to paste it relative to the text origin
+    """
+    text: str
+    width: int
+    bitmaps: Mapping[float, Tuple[PILImage.Image, int, int]]
+
+
+class ValueLine(NamedTuple):
+    """
+    Line of a sticker that contains a value, only the value (and so the horizontal position) is unknown before rendering
+    """
+    name: str
+    font: str
+    y: float
+    prefix: Optional[InlineText]
+    suffix: Optional[InlineText]
+    static_width: int
+    atlas: Optional[Mapping[str, GlyphBitmap]]
+
+
+class StickerLayoutPlan(NamedTuple):
+    """
+    Immutable layout of a sticker type, compiled once when the sticker type is created
+    """
+    name: str
+    align: str
+    left: int
+    width: int
+    static_elements: Tuple[TextElement, ...]
+    value_lines: Tuple[ValueLine, ...]
+
+    def place_value_line(self, line, value):
+        """
+        Places a value line on the sticker, only the value is measured
+        :param line: ValueLine to place
+        :param value: Value of the line
+        :return: prefix, value, suffix as TextElement (prefix and suffix are None if the line has none)
+        :raises Exception: If the line is too long
+        """
+        if line.atlas is not None and value in line.atlas:
+            value_width = line.atlas[value].width
+        else:
+            value_width = StickerGenerator.get_text_width(value, line.font)
+        line_size = line.static_width + value_width
+        if line_size > self.width:
+            raise Exception("Line too long",
+                            line.name,
+                            (line.prefix.text if line.prefix else "") + value + (line.suffix.text if line.suffix else ""))
+
+        x = self.left
+        if self.align == 'center':
+            x += (self.width - line_size) / 2
+
+        prefix = None
+        if line.prefix:
+            prefix = TextElement(line.prefix.text, line.prefix.font, x, line.y)
+            x += line.prefix.width
+        value_element = TextElement(value, line.font, x, line.y)
+        x += value_width
+        suffix = None
+        if line.suffix:
+            suffix = TextElement(line.suffix.text, line.suffix.font, x, line.y)
+        return prefix, value_element, suffix
+
+
+def render_glyph(text, font_key):
+    """
+    Pre-renders a text in a font, for every phase of GLYPH_PHASES
+    Each mask is what ImageDraw.text would blend on the sticker, so pasting black through it gives the same pixels
+    :param text: Text to render
+    :param font_key: Key of the font to render the text with
+    :return: The GlyphBitmap of the text
+    """
+    font = StickerGenerator.fonts[font_key]['font']
+    left, top, right, bottom = font.getbbox(text)
+    origin_x, origin_y = 1 - left, 1 - top
+
+    bitmaps = {}
+    for phase in GLYPH_PHASES:
+        mask = PILImage.new("L", (right - left + 3, bottom - top + 3), 0)
+        ImageDraw.Draw(mask).text((origin_x + phase, origin_y), text, 255, font=font)
+        bitmaps[phase] = (mask, -origin_x, -origin_y)
+
+    return GlyphBitmap(text, StickerGenerator.get_text_width(text, font_key), MappingProxyType(bitmaps))
+
+
+def compile_atlas(data):
+    """
+    Pre-renders all the possible values of a list sticker data
+    :param data: Sticker data to compile the atlas of
+    :return: The atlas (read only mapping of value to GlyphBitmap), None if the data is not a list
+    """
+    if not isinstance(data, StickerDataList):
+        return None
+    return MappingProxyType({value: render_glyph(value, data.font) for value in data.values})
+
+
+def compile_block_text(sticker, data, text, font, y, width):
+    """
+    Compiles a block prefix or suffix of a sticker data into a positioned static element
+    :param sticker: Sticker type the data belongs to
+    :param data: Sticker data of the text
+    :param text: Text of the block
+    :param font: Font key of the block
+    :param y: Y coordinate of the block
+    :param width: Maximum width of the sticker drawable area
+    :return: The positioned TextElement
+    :raises Exception: If the block is too long
+    """
+    size = StickerGenerator.get_text_width(text, font)
+    if size > width:
+        raise Exception("Line too long", data.name, text)
+
+    x = TEXT_AREA_LEFT
+    if sticker.align == 'center':
+        x += (width - size) / 2
+    return TextElement(text, font, x, y)
+
+
+def compile_layout(sticker):
+    """
+    Compiles the layout of a sticker type: every static text gets its coordinates, every value line its vertical
+    position and the values of list data are pre-rendered, so that a render only needs to measure and place the values
+    :param sticker: Sticker type to compile
+    :return: The StickerLayoutPlan of the sticker type
+    :raises Exception: If a static text does not fit on the sticker
+    """
+    width = TEXT_AREA_RIGHT - TEXT_AREA_LEFT
+    static_elements = []
+    value_lines = []
+
+    text_y_coordinates = 0
+    for data in sticker.data:
+        if data.blockprefix:
+            static_elements.append(compile_block_text(sticker, data, data.blockprefix, data.prefixfont,
+                                                      text_y_coordinates, width))
+            text_y_coordinates += StickerGenerator.get_font_real_size(data.prefixfont)
+
+        prefix = None
+        if data.inlineprefix:
+            prefix = InlineText(data.inlineprefix, data.prefixfont,
+                                StickerGenerator.get_text_width(data.inlineprefix, data.prefixfont))
+        suffix = None
+        if data.inlinesuffix:
+            suffix = InlineText(data.inlinesuffix, data.suffixfont,
+                                StickerGenerator.get_text_width(data.inlinesuffix, data.suffixfont))
+        static_width = (prefix.width if prefix else 0) + (suffix.width if suffix else 0)
+        if static_width > width:
+            raise Exception("Line too long", data.name, (data.inlineprefix or "") + (data.inlinesuffix or ""))
+        value_lines.append(ValueLine(data.name, data.font, text_y_coordinates, prefix, suffix, static_width,
+                                     compile_atlas(data)))
+
+        biggest_font = StickerGenerator.get_font_real_size(data.font)
+        if StickerGenerator.get_font_real_size(data.prefixfont) > biggest_font:
+            biggest_font = StickerGenerator.get_font_real_size(data.prefixfont)
+        elif StickerGenerator.get_font_real_size(data.suffixfont) > biggest_font:
+            biggest_font = StickerGenerator.get_font_real_size(data.suffixfont)
+
+        text_y_coordinates += biggest_font
+
+        if data.blocksuffix:
+            static_elements.append(compile_block_text(sticker, data, data.blocksuffix, data.suffixfont,
+                                                      text_y_coordinates, width))
+            text_y_coordinates += StickerGenerator.get_font_real_size(data.suffixfont)
+
+        text_y_coordinates += FIELD_SPACING
+
+    return StickerLayoutPlan(sticker.name, sticker.align, TEXT_AREA_LEFT, width,
+                             tuple(static_elements), tuple(value_lines))
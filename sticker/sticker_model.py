@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+from threading import Lock
+
+from sticker.stickers import Stickers
+from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
+from sticker.sticker_generation import StickerGenerator
+from sticker.sticker_type import StickerType
+
+# Sticker data class of each data type of the model, with the keys of the data passed as positional arguments after the
+# name (see register_data_type)
+DATA_TYPES = {
+    'number': (StickerDataNumber, ()),
+    'text': (StickerDataText, ()),
+    'date': (StickerDataDate, ()),
+    'list': (StickerDataList, ('values',)),
+}
+
+ALIGNMENTS = ('left', 'center')
+
+# Optional keys of a data, with the keyword argument of the StickerData constructor they are passed as
+DATA_TEXT_KEYS = {
+    'inline_prefix': 'inlineprefix',
+    'inline_suffix': 'inlinesuffix',
+    'block_prefix': 'blockprefix',
+    'block_suffix': 'blocksuffix',
+}
+DATA_FONT_KEYS = {
+    'font': 'font',
+    'prefix_font': 'prefixfont',
+    'suffix_font': 'suffixfont',
+}
+
+loaders = {}
+loaders_lock = Lock()
+
+
+def register_data_type(type_name, data_class, positional_keys=()):
+    """
+    Register a sticker data type, so that the model can use it
+    :param type_name: Name of the type in the model ("type" of the data)
+    :param data_class: StickerData subclass of the type
+    :param positional_keys: Keys of the data passed as positional arguments after the name (required in the model)
+    :return: None
+    """
+    DATA_TYPES[type_name] = (data_class, tuple(positional_keys))
+
+
+def get_data_type_name(data):
+    """
+    Get the name in the model of the type of a sticker data
+    :param data: StickerData
+    :return: The type name | the class name if the type is not registered
+    """
+    for type_name, (data_class, _) in DATA_TYPES.items():
+        if type(data) is data_class:
+            return type_name
+    return type(data).__name__
+
+
+def validate_model(model):
+    """
+    Check a stickers model against the schema
+    :param model: Parsed content of the model file
+    :return: List of the errors, each as (path in the model, message) | empty if the model is valid
+    """
+    errors = []
+    if not isinstance(model, list):
+        return [("", "the model must be a list of stickers")]
+
+    font_keys = set(StickerGenerator.fonts)
+    sticker_names = set()
+    for i, sticker in enumerate(model):
+        path = "[%d]" % i
+        if not isinstance(sticker, dict):
+            errors.append((path, "a sticker must be an object"))
+            continue
+        name = sticker.get('name')
+        if not isinstance(name, str) or name == "":
+            errors.append((path + ".name", "required text"))
+        elif name in sticker_names:
+            errors.append((path + ".name", "duplicate sticker name " + name))
+        else:
+            sticker_names.add(name)
+        if sticker.get('align', 'left') not in ALIGNMENTS:
+            errors.append((path + ".align", "must be one of " + ", ".join(ALIGNMENTS)))
+
+        datas = sticker.get('data')
+        if not isinstance(datas, list) or not datas:
+            errors.append((path + ".data", "required non empty list"))
+            continue
+        data_names = set()
+        for j, data in enumerate(datas):
+            data_path = "%s.data[%d]" % (path, j)
+            if not isinstance(data, dict):
+                errors.append((data_path, "a data must be an object"))
+                continue
+            data_name = data.get('name')
+            if not isinstance(data_name, str) or data_name == "":
+                errors.append((data_path + ".name", "required text"))
+            elif data_name in data_names:
+                errors.append((data_path + ".name", "duplicate data name " + data_name))
+            else:
+                data_names.add(data_name)
+            if not isinstance(data.get('type'), str) or data['type'] not in DATA_TYPES:
+                errors.append((data_path + ".type", "must be one of " + ", ".join(DATA_TYPES)))
+            elif 'values' in DATA_TYPES[data['type']][1]:
+                values = data.get('values')
+                if not isinstance(values, list) or not values or not all(isinstance(v, str) for v in values):
+                    errors.append((data_path + ".values", "required non empty list of texts"))
+            for key in DATA_TEXT_KEYS:
+                if data.get(key) is not None and not isinstance(data[key], str):
+                    errors.append((data_path + "." + key, "must be a text"))
+            for key in DATA_FONT_KEYS:
+                if data.get(key) is not None and (not isinstance(data[key], str) or data[key] not in font_keys):
+                    errors.append((data_path + "." + key, "unknown font " + str(data[key])))
+    return errors
+
+
+def compile_model(model):
+    """
+    Create the sticker types of a valid stickers model (the layouts of the sticker types are compiled)
+    A sticker type with a static text too long for the sticker is not created, it is listed in the unusable stickers of
+    the Stickers object and the other sticker types are still usable
+    :param model: Parsed content of the model file, checked with validate_model
+    :return: The Stickers object
+    """
+    stickers = Stickers()
+    for i, sticker in enumerate(model):
+        datas = []
+        for data in sticker['data']:
+            data_class, positional_keys = DATA_TYPES[data['type']]
+            kwargs = {argument: data.get(key) for key, argument in DATA_TEXT_KEYS.items()}
+            kwargs.update({argument: data[key] for key, argument in DATA_FONT_KEYS.items()
+                           if data.get(key) is not None})
+            datas.append(data_class(data['name'], *[data[key] for key in positional_keys], **kwargs))
+
+        try:
+            stickers.add_sticker(StickerType(sticker['name'], datas, align=sticker.get('align', 'left')))
+        except Exception as e:
+            if not e.args or e.args[0] != "Line too long":
+                raise
+            stickers.add_unusable_sticker(sticker['name'], get_text_path(i, sticker, e.args[1], e.args[2]),
+                                          "text too long for the sticker: " + e.args[2])
+    return stickers
+
+
+def get_text_path(i, sticker, data_name, text):
+    """
+    Get the path in the model of a static text of a sticker
+    :param i: Index of the sticker in the model
+    :param sticker: Sticker of the model
+    :param data_name: Name of the data of the text
+    :param text: Static text (a block text, or the inline prefix and suffix of the data)
+    :return: The path of the text | the path of the data if the text is not found
+    """
+    for j, data in enumerate(sticker['data']):
+        if data['name'] == data_name:
+            path = "[%d].data[%d]" % (i, j)
+            for key in DATA_TEXT_KEYS:
+                if data.get(key) == text:
+                    return path + "." + key
+            return path
+    return "[%d]" % i
+
+
+class StickerModelLoader:
+    """
+    Loader of a stickers model file (data.json): the model is checked and compiled once, and again only when the file
+    changes (modification time or size changed, then content hash changed)
+    """
+    def __init__(self, model_path=os.path.join('model', 'data.json')):
+        """
+        StickerModelLoader constructor
+        :param model_path: Path to the data.json file
+        :return: None
+        """
+        self.model_path = model_path
+        self.stamp = None
+        self.digest = None
+        self.stickers = None
+        self.version = 0
+        self.error = None
+        self.error_stamp = None
+        self.lock = Lock()
+
+    def load(self):
+        """
+        Get the stickers of the model, compiled again only if the file changed
+        :return: The Stickers object
+        :raises Exception: If the model is invalid (see validate_model), the previous stickers are kept
+        """
+        self.reload_if_changed()
+        return self.stickers
+
+    def reload_if_changed(self):
+        """
+        Load the model again if the file changed since the last load
+        :return: True if new stickers were loaded, False if the file (or its content) did not change
+        :raises Exception: If the model is invalid (see validate_model), the previous stickers are kept (an exception
+                           with the same arguments is raised until the file changes again)
+        """
+        stat = os.stat(self.model_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if stamp == self.stamp:
+                return False
+            if stamp == self.error_stamp:
+                # a new exception each time, raising the kept one again would add to its traceback on every check
+                raise type(self.error)(*self.error.args)
+
+            with open(self.model_path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest == self.digest:
+                self.stamp = stamp
+                return False
+
+            try:
+                try:
+                    model = json.loads(content.decode('utf-8-sig'))
+                except ValueError as e:
+                    raise Exception("Invalid model", self.model_path, [("", str(e))])
+                errors = validate_model(model)
+                if errors:
+                    raise Exception("Invalid model", self.model_path, errors)
+                # the stickers are kept even if none is usable (e.g. the fonts of the system are wider), the callers
+                # report the unusable ones (see Stickers.get_unusable_errors)
+                stickers = compile_model(model)
+            except Exception as e:
+                self.error = e
+                self.error_stamp = stamp
+                raise
+
+            self.stickers = stickers
+            self.stamp = stamp
+            self.digest = digest
+            self.version += 1
+            return True
+
+
+def get_loader(model_path='model/data.json'):
+    """
+    Get the loader of a model file, one per file
+    :param model_path: Path to the data.json file
+    :return: The StickerModelLoader of the file
+    """
+    with loaders_lock:
+        loader = loaders.get(model_path)
+        if loader is None:
+            loader = loaders[model_path] = StickerModelLoader(model_path)
+        return loader
+
+
+def load_stickers(model_path='model/data.json'):
+    """
+    Get the stickers from the data.json file and create the Stickers object (compiled once per file and file content)
+    :param model_path: Path to the data.json file
+    :return: The Stickers object
+    :raises Exception: If the model is invalid (see validate_model)
+    """
+    return get_loader(model_path).load()
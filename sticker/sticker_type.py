@@ -1,13 +1,16 @@
-from datetime import datetime
-
-from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
 from sticker.sticker_generation import StickerGenerator
+from sticker.sticker_layout import compile_layout
+from sticker.sticker_validation import StickerValidator, parse_date
 
 
 class StickerType:
     """
     Class to represent a sticker
+    A sticker type is a template: it never changes, the values of each sticker to generate are given as a StickerValues
+    record (see validate), so several jobs can use the same sticker type at once
     """
+    __slots__ = ('name', 'align', 'data', 'fields', 'layout', 'validator')
+
     def __init__(self, name, data, align="left"):
         """
         StickerType constructor
@@ -15,10 +18,21 @@ class StickerType:
         :param data: List of StickerData
         :param align: Alignment of the sticker when printed
         :return: None
+        :raises Exception: If a static text of the sticker is too long (see compile_layout)
+        """
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'align', align)
+        object.__setattr__(self, 'data', tuple(data))
+        object.__setattr__(self, 'fields', tuple(data.name for data in self.data))
+        object.__setattr__(self, 'layout', compile_layout(self))
+        object.__setattr__(self, 'validator', StickerValidator(self))
+
+    def __setattr__(self, name, value):
+        """
+        Sticker types can not be changed
+        :raises AttributeError: Always
         """
-        self.name = name
-        self.align = align
-        self.data = data
+        raise AttributeError("StickerType is immutable")
 
     def __str__(self):
         """
@@ -27,58 +41,72 @@ class StickerType:
         """
         return self.name
 
-    def is_valid(self):
-        """
-        Check if it is a valid sticker
-        :return: False if one of the data is not valid, True otherwise
-        """
-        for data in self.data:
-            if isinstance(data, StickerDataText):
-                if data.value is None or data.value == "":
-                    return False
-            elif isinstance(data, StickerDataNumber):
-                if data.value is None or data.value == "":
-                    return False
-                try:
-                    int(data.value)
-                except ValueError:
-                    return False
-            elif isinstance(data, StickerDataDate):
-                if data.value is None or data.value == "":
-                    return False
-                try:
-                    data.value = StickerType.convert_date(data.value)
-                except Exception as e:
-                    print(e)
-                    return False
-            elif isinstance(data, StickerDataList):
-                if data.value is None or data.value == "" or data.value not in data.values:
-                    return False
-        return True
+    def __reduce__(self):
+        """
+        Pickle the sticker as its constructor arguments (e.g. to send it to a rendering process), without the compiled
+        layout and validator: they are compiled again in the receiving process
+        :return: The constructor and its arguments
+        """
+        return StickerType, (self.name, self.data, self.align)
+
+    def get_definition(self):
+        """
+        Get the definition of the sticker, e.g. to know if a pdf of the sticker generated earlier is still valid
+        :return: The definition of the sticker, json serializable
+        """
+        return {
+            'name': self.name,
+            'align': self.align,
+            'data': [dict(data.get_attributes(), type=type(data).__name__) for data in self.data],
+        }
+
+    def validate(self, values):
+        """
+        Check the values of a sticker and create its value record
+        :param values: Values to check by data name (not changed)
+        :return: The StickerValues of the sticker, with the dates in the format dd/mm/yyyy | None if one of the values is
+                 not valid
+        """
+        return self.validator.validate(values)
+
+    def get_errors(self, values):
+        """
+        Check every value of a sticker
+        :param values: Values to check by data name (not changed)
+        :return: List of the FieldError of the invalid values (see StickerValidator), empty if the values are valid
+        """
+        return self.validator.get_errors(values)
+
+    def is_valid(self, values):
+        """
+        Check if the values of a sticker are valid
+        :param values: Values to check by data name (not changed)
+        :return: False if one of the values is not valid, True otherwise
+        """
+        return self.validator.validate(values) is not None
 
     @staticmethod
     def convert_date(date):
         """
         Convert a date to the format dd/mm/yyyy
-        :param date: Date to convert
+        :param date: Date to convert (dd/mm/yyyy, dd-mm-yyyy or dd.mm.yyyy)
         :return: The date in the format dd/mm/yyyy
         :raises Exception: If the date is not in a valid format
         """
-        for fmt in ('%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y'):
-            try:
-                date = datetime.strptime(date, fmt)
-                return date.strftime('%d/%m/%Y')
-            except ValueError:
-                pass
-        raise Exception('no valid date format found')
+        converted_date = parse_date(date)
+        if converted_date is None:
+            raise Exception('no valid date format found')
+        return converted_date
 
-    def generate(self, save_file_path, state_callback=None, **kwargs):
+    def generate(self, values, save_file_path, state_callback=None, use_pdf_cache=True, **kwargs):
         """
         Generate the sticker
+        :param values: StickerValues of the sticker (see validate)
         :param save_file_path: Path to save the sticker
         :param state_callback: Callback function for updating progress bar states corresponding to the current state
+        :param use_pdf_cache: True to copy the pdf from the pdf cache when the sticker was generated before
         :param kwargs: Keyword arguments for the pdf generation (stickers_left, total_stickers)
-        :return: None
+        :return: Measured duration in seconds of each generation stage, by state
         """
-        sticker_generator = StickerGenerator(state_callback)
-        sticker_generator.generate_stickers(self, save_file_path, **kwargs)
+        sticker_generator = StickerGenerator(state_callback, use_pdf_cache=use_pdf_cache)
+        return sticker_generator.generate_stickers(self, values, save_file_path, **kwargs)
@@ -0,0 +1,238 @@
+import re
+from typing import Any, List, NamedTuple, Optional
+
+from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
+from sticker.sticker_values import StickerValues
+
+MISSING = "missing"
+NOT_A_NUMBER = "not a whole number"
+NOT_A_DATE = "not a valid date (dd/mm/yyyy, dd-mm-yyyy or dd.mm.yyyy)"
+NOT_IN_LIST = "not one of the values of the list"
+
+# Same days, months and years as datetime.strptime with %d, %m and %Y, the separator is the same twice
+DATE_PATTERN = re.compile(r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])([/.-])(1[0-2]|0[1-9]|[1-9])\2(\d\d\d\d)")
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+class FieldError(NamedTuple):
+    """
+    Invalid value of a row: the row (index in the validated rows), the field, the value and why it is not valid
+    """
+    row: int
+    field: str
+    value: Any
+    message: str
+
+    def __str__(self):
+        """
+        Readable description of the error
+        :return: The error, with the row numbered from 1
+        """
+        return "record %d, %s: %s (%r)" % (self.row + 1, self.field, self.message, self.value)
+
+
+class BatchValidation(NamedTuple):
+    """
+    Result of the validation of rows: the StickerValues of each row (None for the invalid rows) and every error
+    """
+    records: List[Optional[StickerValues]]
+    errors: List[FieldError]
+
+
+def parse_date(date):
+    """
+    Convert a date to the format dd/mm/yyyy in a single pass (accepts the same dates as convert_date in StickerType)
+    :param date: Date as dd/mm/yyyy, dd-mm-yyyy or dd.mm.yyyy
+    :return: The date in the format dd/mm/yyyy | None if the date is not valid
+    """
+    match = DATE_PATTERN.fullmatch(date) if isinstance(date, str) else None
+    if match is None:
+        return None
+    day, _, month, year = match.groups()
+    day, month, year = int(day), int(month), int(year)
+    if year == 0:
+        return None
+    if day > DAYS_IN_MONTH[month] and not (month == 2 and day == 29 and year % 4 == 0
+                                           and (year % 100 != 0 or year % 400 == 0)):
+        return None
+    return "%02d/%02d/%04d" % (day, month, year)
+
+
+def compile_text_validator(_data):
+    """
+    Compile the validator of a text data
+    :param _data: Unused parameter
+    :return: Function checking a value, it returns the value or raises ValueError with the message of the error
+    """
+    def validate_text(value):
+        if value is None or value == "":
+            raise ValueError(MISSING)
+        return value
+    return validate_text
+
+
+def compile_number_validator(_data):
+    """
+    Compile the validator of a number data
+    :param _data: Unused parameter
+    :return: Function checking a value, it returns the value or raises ValueError with the message of the error
+    """
+    def validate_number(value):
+        if value is None or value == "":
+            raise ValueError(MISSING)
+        try:
+            int(value)
+        except (ValueError, TypeError):
+            raise ValueError(NOT_A_NUMBER)
+        return value
+    return validate_number
+
+
+def compile_date_validator(_data):
+    """
+    Compile the validator of a date data
+    :param _data: Unused parameter
+    :return: Function checking a value, it returns the date as dd/mm/yyyy or raises ValueError with the message of the
+             error
+    """
+    def validate_date(value):
+        if value is None or value == "":
+            raise ValueError(MISSING)
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(NOT_A_DATE)
+        return date
+    return validate_date
+
+
+def compile_list_validator(data):
+    """
+    Compile the validator of a list data, the values of the list are looked up in a set
+    :param data: StickerDataList
+    :return: Function checking a value, it returns the value or raises ValueError with the message of the error
+    """
+    values = frozenset(data.values)
+
+    def validate_list(value):
+        if value is None or value == "":
+            raise ValueError(MISSING)
+        try:
+            if value in values:
+                return value
+        except TypeError:
+            pass
+        raise ValueError(NOT_IN_LIST)
+    return validate_list
+
+
+def accept_value(value):
+    """
+    Validator of the data types without validator: every value is valid
+    :param value: Value of the data
+    :return: The value
+    """
+    return value
+
+
+# Function compiling the validator of a sticker data, by sticker data class (see register_validator)
+VALIDATORS = {
+    StickerDataText: compile_text_validator,
+    StickerDataNumber: compile_number_validator,
+    StickerDataDate: compile_date_validator,
+    StickerDataList: compile_list_validator,
+}
+
+
+def register_validator(data_class, compile_validator):
+    """
+    Register the validator of a sticker data class, e.g. for a data type added with register_data_type
+    :param data_class: StickerData subclass
+    :param compile_validator: Function called with a sticker data of the class, it returns a function that returns the
+                              value (converted if needed) or raises ValueError with the message of the error
+    :return: None
+    """
+    VALIDATORS[data_class] = compile_validator
+
+
+def compile_data_validator(data):
+    """
+    Compile the validator of a sticker data
+    :param data: StickerData
+    :return: The validator of the closest registered class of the data | a validator accepting every value
+    """
+    for data_class in type(data).__mro__:
+        if data_class in VALIDATORS:
+            return VALIDATORS[data_class](data)
+    return accept_value
+
+
+class StickerValidator:
+    """
+    Validators of the data of a sticker type, compiled once when the sticker type is created, to check single values
+    (GUI, service) as well as thousands of rows (CSV files, batches)
+    """
+    __slots__ = ('fields', 'validators')
+
+    def __init__(self, sticker):
+        """
+        StickerValidator constructor
+        :param sticker: StickerType to validate the values of
+        :return: None
+        """
+        self.fields = sticker.fields
+        self.validators = tuple((data.name, compile_data_validator(data)) for data in sticker.data)
+
+    def validate(self, values):
+        """
+        Check the values of a sticker and create its value record, stops at the first invalid value
+        :param values: Values to check by data name (not changed)
+        :return: The StickerValues of the sticker | None if one of the values is not valid
+        """
+        get = values.get
+        try:
+            return StickerValues(self.fields, [validator(get(name)) for name, validator in self.validators])
+        except ValueError:
+            return None
+
+    def check(self, values, row=0):
+        """
+        Check the values of a sticker and create its value record, with every error
+        :param values: Values to check by data name (not changed)
+        :param row: Index of the row of the values, for the errors
+        :return: (StickerValues of the sticker | None if a value is not valid, list of the FieldError)
+        """
+        record = self.validate(values)
+        return (record, []) if record is not None else (None, self.get_errors(values, row))
+
+    def get_errors(self, values, row=0):
+        """
+        Check every value of a sticker
+        :param values: Values to check by data name (not changed)
+        :param row: Index of the row of the values, for the errors
+        :return: List of the FieldError, empty if the values are valid
+        """
+        errors = []
+        for name, validator in self.validators:
+            value = values.get(name)
+            try:
+                validator(value)
+            except ValueError as e:
+                errors.append(FieldError(row, name, value, e.args[0]))
+        return errors
+
+    def validate_rows(self, rows):
+        """
+        Check many rows of values, valid rows cost a single pass over their fields, every error of the invalid rows is
+        reported
+        :param rows: Iterable of values by data name
+        :return: The BatchValidation of the rows
+        """
+        records = []
+        errors = []
+        validate = self.validate
+        for i, values in enumerate(rows):
+            record = validate(values)
+            if record is None:
+                errors.extend(self.get_errors(values, i))
+            records.append(record)
+        return BatchValidation(records, errors)
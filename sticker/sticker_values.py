@@ -0,0 +1,74 @@
+from collections.abc import Mapping
+
+
+class StickerValues(Mapping):
+    """
+    Values of a sticker for one job: a small immutable record (the field names, shared by all the records of a sticker
+    type, and a tuple of values), read like a dict by data name
+    Jobs each have their own record, so the same sticker type can be generated by several jobs at once
+    """
+    __slots__ = ('fields', 'values')
+
+    def __init__(self, fields, values):
+        """
+        StickerValues constructor
+        :param fields: Names of the data of the sticker type, in order (see StickerType.fields)
+        :param values: Value of each data, in the same order
+        :return: None
+        """
+        object.__setattr__(self, 'fields', fields)
+        object.__setattr__(self, 'values', tuple(values))
+
+    def __setattr__(self, name, value):
+        """
+        Values can not be changed
+        :raises AttributeError: Always
+        """
+        raise AttributeError("StickerValues is immutable")
+
+    def __reduce__(self):
+        """
+        Pickle the record as its constructor arguments (e.g. to send it to a rendering process)
+        :return: The constructor and its arguments
+        """
+        return StickerValues, (self.fields, self.values)
+
+    def __getitem__(self, name):
+        """
+        Get the value of a data
+        :param name: Name of the data
+        :return: The value of the data
+        :raises KeyError: If the sticker type has no data with this name
+        """
+        try:
+            return self.values[self.fields.index(name)]
+        except ValueError:
+            raise KeyError(name)
+
+    def __iter__(self):
+        """
+        Iterate over the data names
+        :return: An iterator over the data names, in order
+        """
+        return iter(self.fields)
+
+    def __len__(self):
+        """
+        Number of values
+        :return: The number of values
+        """
+        return len(self.fields)
+
+    def __hash__(self):
+        """
+        Hash of the record, records with the same values have the same hash
+        :return: The hash of the record
+        """
+        return hash((self.fields, self.values))
+
+    def __repr__(self):
+        """
+        Representation of the record
+        :return: The values as a dict
+        """
+        return "StickerValues(%r)" % dict(self)
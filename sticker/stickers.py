@@ -11,8 +11,26 @@ class Stickers:
             self.stickers_list = []
         else:
             self.stickers_list = stickers
+        self.stickers_by_name = {sticker.name: sticker for sticker in self.stickers_list}
+        self.unusable_stickers = {}
         self.selected_sticker = None
 
+    def __contains__(self, name):
+        """
+        Check if there is a sticker with a name
+        :param name: Name of the sticker
+        :return: True if there is a sticker with this name
+        """
+        return name in self.stickers_by_name
+
+    def get_sticker(self, name):
+        """
+        Get a sticker by name
+        :param name: Name of the sticker
+        :return: The sticker | None if there is no sticker with this name
+        """
+        return self.stickers_by_name.get(name)
+
     def get_stickers_values(self):
         """
         Get all the stickers names
@@ -27,6 +45,24 @@ class Stickers:
         :return: None
         """
         self.stickers_list.append(sticker)
+        self.stickers_by_name[sticker.name] = sticker
+
+    def add_unusable_sticker(self, name, path, message):
+        """
+        Record a sticker of the model that could not be created (e.g. a text too long for the sticker)
+        :param name: Name of the sticker
+        :param path: Path of the error in the model
+        :param message: Description of the error
+        :return: None
+        """
+        self.unusable_stickers[name] = (path, message)
+
+    def get_unusable_errors(self):
+        """
+        Get the errors of the stickers that could not be created
+        :return: List of (path in the model, message)
+        """
+        return list(self.unusable_stickers.values())
 
     def remove_sticker(self, sticker):
         """
@@ -35,3 +71,5 @@ class Stickers:
         :return: None
         """
         self.stickers_list.remove(sticker)
+        if self.stickers_by_name.get(sticker.name) is sticker:
+            del self.stickers_by_name[sticker.name]
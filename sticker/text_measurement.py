@@ -0,0 +1,136 @@
+from threading import Lock
+
+from sticker.lru_cache import LRUCache
+
+
+class GlyphTable:
+    """
+    Metrics of the glyphs of a font, each glyph is measured the first time it is used
+    """
+    def __init__(self, font):
+        """
+        GlyphTable constructor
+        :param font: PIL font of the table
+        :return: None
+        """
+        self.font = font
+        self.advances = {}
+        self.kernings = {}
+        self.ink_bounds = {}
+        self.lock = Lock()
+
+    def advance(self, char):
+        """
+        Gets the horizontal advance of a glyph
+        :param char: Character of the glyph
+        :return: The advance of the glyph
+        """
+        advance = self.advances.get(char)
+        if advance is None:
+            advance = self.advances[char] = self.font.getlength(char)
+        return advance
+
+    def kerning(self, left_char, right_char):
+        """
+        Gets the kerning adjustment between two glyphs
+        :param left_char: Character of the left glyph
+        :param right_char: Character of the right glyph
+        :return: The kerning adjustment of the pair (0 if the font does not kern it)
+        """
+        pair = left_char + right_char
+        kerning = self.kernings.get(pair)
+        if kerning is None:
+            kerning = self.kernings[pair] = \
+                self.font.getlength(pair) - self.advance(left_char) - self.advance(right_char)
+        return kerning
+
+    def ink_bound(self, char):
+        """
+        Gets the horizontal bounds of a glyph bitmap, relative to the glyph origin
+        Each glyph is rasterized only once, the first time it is measured
+        :param char: Character of the glyph
+        :return: (left of the bitmap, right of the ink), None if the glyph has no ink
+        """
+        if char not in self.ink_bounds:
+            with self.lock:
+                mask, offset = self.font.getmask2(char)
+                bbox = mask.getbbox()
+                self.ink_bounds[char] = (offset[0], offset[0] + bbox[2]) if bbox else None
+        return self.ink_bounds[char]
+
+    def text_width(self, text):
+        """
+        Calculates the width of a text from the glyph metrics, without rasterizing the text
+        The width goes from the left of the bitmap of the first glyph to the right of the ink of the last one, like
+        the bounding box of the text mask
+        :param text: Text to measure
+        :return: The width of the text
+        """
+        first_bound = self.ink_bound(text[0])
+        last_bound = self.ink_bound(text[-1])
+        if first_bound is None or last_bound is None:
+            return self.font.getmask(text).getbbox()[2]
+
+        width = last_bound[1] - first_bound[0]
+        for index in range(len(text) - 1):
+            width += self.advance(text[index]) + self.kerning(text[index], text[index + 1])
+        return round(width)
+
+
+class TextMeasurer:
+    """
+    Memoized text measurement engine, texts are measured from glyph tables and the results are kept in an LRU cache
+    """
+    def __init__(self, fonts, maxsize=4096):
+        """
+        TextMeasurer constructor
+        :param fonts: Fonts that can be measured, by font key (each font is a dict with a 'font' entry)
+        :param maxsize: Maximum number of measured texts kept in the cache
+        :return: None
+        """
+        self.fonts = fonts
+        self.glyph_tables = {}
+        self.cache = LRUCache(maxsize)
+
+    def glyph_table(self, font_key):
+        """
+        Gets the glyph table of a font, creating it on first use
+        :param font_key: Key of the font
+        :return: The glyph table of the font
+        """
+        table = self.glyph_tables.get(font_key)
+        if table is None:
+            table = self.glyph_tables[font_key] = GlyphTable(self.fonts[font_key]['font'])
+        return table
+
+    def text_width(self, text, font_key):
+        """
+        Calculates the width of a text, spaces are measured as underscores so that leading and trailing spaces count
+        :param text: Text to measure
+        :param font_key: Key of the font used to measure the text
+        :return: The width of the text
+        """
+        if not text:
+            return 0
+
+        key = (text, font_key)
+        width = self.cache.get(key)
+        if width is None:
+            width = self.glyph_table(font_key).text_width(text.replace(" ", "_"))
+            self.cache.put(key, width)
+        return width
+
+    def clear(self):
+        """
+        Forgets all the glyph tables and measured texts (to use when the fonts change)
+        :return: None
+        """
+        self.glyph_tables = {}
+        self.cache.clear()
+
+    def stats(self):
+        """
+        Gets the statistics of the measured texts cache
+        :return: A dict with the hits, misses, evictions, current size and maximum size of the cache
+        """
+        return self.cache.stats()
@@ -0,0 +1,160 @@
+"""
+Benchmark of the validation of sticker values: python -m sticker.validation_benchmark --rows 10000 --invalid 0.05
+Measures, for each sticker type of the model, the time per row to validate CSV-like rows with the compiled validators
+(StickerValidator.validate_rows), compared to the validation used before they existed (isinstance chain over the data,
+dates parsed by trying each strptime format)
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+
+from sticker.sticker_data import StickerDataNumber, StickerDataText, StickerDataDate, StickerDataList
+from sticker.sticker_model import load_stickers
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments
+    :param argv: Arguments to parse | default: sys.argv
+    :return: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python -m sticker.validation_benchmark",
+                                     description="Benchmark the validation of sticker values")
+    parser.add_argument("-m", "--model", default="model/data.json", help="path to the stickers model (data.json)")
+    parser.add_argument("--rows", type=int, default=10000, help="number of rows per sticker type (default: 10000)")
+    parser.add_argument("--invalid", type=float, default=0.05,
+                        help="fraction of the rows with an invalid value (default: 0.05)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measure, the best one is kept (default: 5)")
+    return parser.parse_args(argv)
+
+
+def legacy_convert_date(date):
+    """
+    Date conversion used before the compiled validators: each format is tried with strptime
+    :param date: Date to convert
+    :return: The date in the format dd/mm/yyyy
+    :raises Exception: If the date is not in a valid format
+    """
+    for fmt in ('%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y'):
+        try:
+            date = datetime.strptime(date, fmt)
+            return date.strftime('%d/%m/%Y')
+        except ValueError:
+            pass
+    raise Exception('no valid date format found')
+
+
+def legacy_validate(sticker, values):
+    """
+    Validation used before the compiled validators: stops at the first invalid value
+    :param sticker: StickerType of the values
+    :param values: Values to check by data name
+    :return: The list of the values, with the dates as dd/mm/yyyy | None if one of the values is not valid
+    """
+    record = []
+    for data in sticker.data:
+        value = values.get(data.name)
+        if isinstance(data, StickerDataText):
+            if value is None or value == "":
+                return None
+        elif isinstance(data, StickerDataNumber):
+            if value is None or value == "":
+                return None
+            try:
+                int(value)
+            except ValueError:
+                return None
+        elif isinstance(data, StickerDataDate):
+            if value is None or value == "":
+                return None
+            try:
+                value = legacy_convert_date(value)
+            except Exception:
+                return None
+        elif isinstance(data, StickerDataList):
+            if value is None or value == "" or value not in data.values:
+                return None
+        record.append(value)
+    return record
+
+
+def get_rows(sticker, count, invalid, seed=0):
+    """
+    Get rows of values for a sticker type, as read from a CSV file (text), with the three date formats
+    :param sticker: StickerType of the rows
+    :param count: Number of rows
+    :param invalid: Fraction of the rows with an invalid value
+    :param seed: Seed of the random values
+    :return: List of values by data name
+    """
+    generator = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {}
+        for data in sticker.data:
+            if isinstance(data, StickerDataNumber):
+                row[data.name] = str(generator.randint(1, 500))
+            elif isinstance(data, StickerDataDate):
+                row[data.name] = "%d%s%d%s%d" % (generator.randint(1, 28), "/-."[i % 3], generator.randint(1, 12),
+                                                 "/-."[i % 3], generator.randint(2020, 2030))
+            elif isinstance(data, StickerDataList):
+                row[data.name] = generator.choice(data.values)
+            else:
+                row[data.name] = "Valeur %d" % i
+        if sticker.data and generator.random() < invalid:
+            row[generator.choice(sticker.data).name] = generator.choice(("", "abc", "31/02/2024"))
+        rows.append(row)
+    return rows
+
+
+def measure(function, repeat):
+    """
+    Measures a function
+    :param function: Function to call without argument
+    :param repeat: Number of calls, the fastest is kept
+    :return: (result of the last call, best time in seconds)
+    """
+    best_time = None
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        duration = time.perf_counter() - start_time
+        best_time = duration if best_time is None else min(best_time, duration)
+    return result, best_time
+
+
+def main(argv=None):
+    """
+    Run the benchmark and print the results
+    :param argv: Arguments | default: sys.argv
+    :return: Exit code
+    """
+    args = parse_args(argv)
+    stickers = load_stickers(args.model)
+
+    print("%-20s %7s %8s %15s %17s %8s %7s" % ("sticker type", "rows", "invalid", "legacy (us/row)",
+                                               "compiled (us/row)", "speedup", "errors"))
+    for sticker in stickers.stickers_list:
+        rows = get_rows(sticker, args.rows, args.invalid)
+        legacy_records, legacy_time = measure(lambda: [legacy_validate(sticker, row) for row in rows], args.repeat)
+        validation, compiled_time = measure(lambda: sticker.validator.validate_rows(rows), args.repeat)
+
+        # both validations must accept the same rows with the same values
+        for legacy_record, record in zip(legacy_records, validation.records):
+            if (legacy_record is None) != (record is None) or (record is not None
+                                                               and tuple(legacy_record) != record.values):
+                print("%s: the validations differ" % sticker.name, file=sys.stderr)
+                return 1
+
+        print("%-20s %7d %8d %15.2f %17.2f %7.1fx %7d" % (sticker.name, len(rows),
+                                                          validation.records.count(None),
+                                                          1e6 * legacy_time / len(rows), 1e6 * compiled_time / len(rows),
+                                                          legacy_time / compiled_time, len(validation.errors)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
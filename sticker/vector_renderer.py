@@ -0,0 +1,95 @@
+import warnings
+from threading import Lock
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+
+registered_fonts = {}
+registered_fonts_lock = Lock()
+
+
+def get_pdf_font(font_key, font):
+    """
+    Get the name of the pdf font of a sticker font, registering the TrueType file with reportlab on first use
+    :param font_key: Key of the sticker font
+    :param font: Font dict of the font registry ('font', 'path')
+    :return: Name of the pdf font to use with the canvas | None if the font file can not be embedded (e.g. the PIL
+             default font): the texts laid out with the PIL metrics of the font can not be written in another font
+    """
+    with registered_fonts_lock:
+        if font_key not in registered_fonts:
+            pdf_font = None
+            if font['path'] is None:
+                warnings.warn("The font " + font_key + " has no font file to embed in the pdf")
+            else:
+                try:
+                    pdfmetrics.registerFont(TTFont("Sticker-" + font_key, font['path']))
+                    pdf_font = "Sticker-" + font_key
+                except (TTFError, OSError) as e:
+                    warnings.warn("The font file " + font['path'] + " of " + font_key + " can not be embedded in the "
+                                  "pdf: " + str(e))
+            registered_fonts[font_key] = pdf_font
+        return registered_fonts[font_key]
+
+
+class VectorText:
+    """
+    Text of a vector sticker, in the coordinates of the sticker image (pixels, y going down from the top)
+    """
+    __slots__ = ('text', 'pdf_font', 'size', 'x', 'baseline')
+
+    def __init__(self, text, pdf_font, size, x, baseline):
+        """
+        VectorText constructor
+        :param text: Text to write
+        :param pdf_font: Name of the pdf font
+        :param size: Size of the font, in pixels of the sticker image
+        :param x: X coordinate of the start of the text
+        :param baseline: Y coordinate of the baseline of the text
+        :return: None
+        """
+        self.text = text
+        self.pdf_font = pdf_font
+        self.size = size
+        self.x = x
+        self.baseline = baseline
+
+
+class VectorSticker:
+    """
+    Sticker drawn as vectors: the logo as an image (embedded once in the pdf however often it is drawn) and the texts
+    as real pdf text
+    """
+    def __init__(self, logo, logo_size, texts):
+        """
+        VectorSticker constructor
+        :param logo: Logo image, share it between the stickers so that it is embedded once
+        :param logo_size: (width, height) of the logo in pixels, the coordinates of the texts are relative to it
+        :param texts: List of VectorText to write on the logo
+        :return: None
+        """
+        self.logo = logo
+        self.logo_size = logo_size
+        self.texts = texts
+
+    def draw_on(self, canvas, x, y, width, height):
+        """
+        Draws the sticker on a canvas, with the same scaling as the raster sticker image
+        :param canvas: StickerCanvas of the pdf
+        :param x: X coordinate of the bottom left corner of the sticker
+        :param y: Y coordinate of the bottom left corner of the sticker
+        :param width: Width of the sticker on the page
+        :param height: Height of the sticker on the page
+        :return: None
+        """
+        canvas.draw_shared_image(self.logo, x, y, width, height)
+
+        scale_x = width / self.logo_size[0]
+        scale_y = height / self.logo_size[1]
+        for text in self.texts:
+            canvas.saveState()
+            canvas.translate(x + text.x * scale_x, y + height - text.baseline * scale_y)
+            canvas.scale(scale_x, scale_y)
+            canvas.setFont(text.pdf_font, text.size)
+            canvas.drawString(0, 0, text.text)
+            canvas.restoreState()